@@ -19,6 +19,8 @@ load_dotenv(Path(__file__).parent.parent.parent / ".env")
 
 from thordata import ThordataClient, ProxyConfig, ProxyProduct
 
+from proxy_tools import use_cassette
+
 # Get credentials
 SCRAPER_TOKEN = os.getenv("THORDATA_SCRAPER_TOKEN")
 RESIDENTIAL_USERNAME = os.getenv("THORDATA_RESIDENTIAL_USERNAME")
@@ -38,7 +40,8 @@ if not RESIDENTIAL_USERNAME or not RESIDENTIAL_PASSWORD:
 
 def main():
     # Initialize client
-    client = ThordataClient(scraper_token=SCRAPER_TOKEN)
+    # use_cassette() is a no-op unless THORDATA_CASSETTE is set (record/replay)
+    client = use_cassette(ThordataClient(scraper_token=SCRAPER_TOKEN))
 
     # Build proxy configuration (same as other examples)
     proxy_kwargs: dict = {
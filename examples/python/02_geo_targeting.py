@@ -8,6 +8,12 @@ Usage:
     python 02_geo_targeting.py
     python 02_geo_targeting.py --country de
     python 02_geo_targeting.py --country us --state california --city seattle
+    python 02_geo_targeting.py --country de --geo-db geo.tdgeo
+    python 02_geo_targeting.py --compress   # negotiate gzip/br/zstd, report wire bytes
+
+With --geo-db (or THORDATA_GEO_DB) the exit IP comes from a minimal IP echo
+and its location from a local, memory-mapped database instead of ipinfo.io;
+see proxy_tools/geo_db.py for building one.
 """
 
 import argparse
@@ -21,12 +27,17 @@ load_dotenv(Path(__file__).parent.parent.parent / ".env")
 
 from thordata import ThordataClient, ProxyConfig, ProxyProduct
 
+from proxy_tools import CompressedClient, decode_ip_info, open_geo_db, use_cassette
+
 # Get credentials (residential proxy user)
 RESIDENTIAL_USERNAME = os.getenv("THORDATA_RESIDENTIAL_USERNAME")
 RESIDENTIAL_PASSWORD = os.getenv("THORDATA_RESIDENTIAL_PASSWORD")
 SCRAPER_TOKEN = os.getenv("THORDATA_SCRAPER_TOKEN")
 PROXY_HOST = os.getenv("THORDATA_PROXY_HOST")
 PROXY_PORT = os.getenv("THORDATA_PROXY_PORT")
+GEO_DB = os.getenv("THORDATA_GEO_DB")
+
+IP_ECHO_URL = "https://api.ipify.org?format=json"
 
 
 def parse_args():
@@ -52,6 +63,16 @@ def parse_args():
         default="residential",
         help="Proxy product type"
     )
+    parser.add_argument(
+        "--geo-db",
+        default=GEO_DB,
+        help="Offline geo database (.tdgeo or .mmdb) used instead of ipinfo.io"
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="Negotiate compression and report compressed vs. decoded size"
+    )
     return parser.parse_args()
 
 
@@ -100,9 +121,14 @@ def main():
 
     # Initialize client
     client = ThordataClient(scraper_token=SCRAPER_TOKEN)
+    if args.compress:
+        client = CompressedClient(client)
+    client = use_cassette(client)
+
+    geo_db = open_geo_db(args.geo_db) if args.geo_db else None
 
-    # Request IP info
-    url = "https://ipinfo.io/json"
+    # Request IP info (only the IP when locating it offline)
+    url = IP_ECHO_URL if geo_db else "https://ipinfo.io/json"
 
     print(f"Requesting: {url}")
 
@@ -110,19 +136,41 @@ def main():
         response = client.get(url, proxy_config=proxy_config, timeout=30)
         response.raise_for_status()
 
-        data = response.json()
+        info = decode_ip_info(response.content)
+        if geo_db:
+            location = geo_db.lookup(info.ip)
+            if location:
+                info.country, info.region, info.city = location.country, location.region, location.city
 
         print()
         print(f"[SUCCESS] Response:")
-        print(f"   IP:      {data.get('ip', 'N/A')}")
-        print(f"   Country: {data.get('country', 'N/A')}")
-        print(f"   Region:  {data.get('region', 'N/A')}")
-        print(f"   City:    {data.get('city', 'N/A')}")
-        print(f"   Org:     {data.get('org', 'N/A')}")
+        print(f"   IP:      {info.ip or 'N/A'}")
+        print(f"   Country: {info.country or 'N/A'}")
+        print(f"   Region:  {info.region or 'N/A'}")
+        print(f"   City:    {info.city or 'N/A'}")
+        if not geo_db:
+            print(f"   Org:     {info.org or 'N/A'}")
+
+        compression = getattr(response, "compression", None)
+        if compression:
+            print(f"   Wire:    {compression.wire_bytes} bytes {compression.encoding} "
+                  f"-> {compression.body_bytes} bytes ({compression.ratio:.1f}x)")
+
+        if geo_db:
+            print()
+            if not info.country:
+                print(f"[WARNING] {info.ip} is not in {args.geo_db}")
+            elif info.country.lower() == args.country.lower():
+                print(f"   Geo check: exit is in {args.country.upper()} (offline lookup)")
+            else:
+                print(f"[WARNING] Exit is in {info.country}, expected {args.country.upper()}")
 
     except Exception as e:
         print(f"[ERROR] {e}")
         sys.exit(1)
+    finally:
+        if geo_db:
+            geo_db.close()
 
 
 if __name__ == "__main__":
@@ -4,6 +4,11 @@
 Maintain the same proxy IP across multiple requests using sticky sessions.
 Useful for multi-step operations that require IP consistency.
 
+Requests of one session ride a single kept-alive tunnel (proxy connection +
+CONNECT + TLS). ThordataClient keeps that connection alive as well; the pool
+used here additionally retires it when the session expires, bounds how many
+sessions stay open and reports how many tunnels were opened.
+
 Usage:
     python 03_sticky_session.py
     python 03_sticky_session.py --duration 15 --requests 5
@@ -12,6 +17,7 @@ Usage:
 import argparse
 import os
 import sys
+import time
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -20,6 +26,8 @@ load_dotenv(Path(__file__).parent.parent.parent / ".env")
 
 from thordata import ThordataClient, StickySession
 
+from proxy_tools import StickyTunnelPool, use_cassette
+
 RESIDENTIAL_USERNAME = os.getenv("THORDATA_RESIDENTIAL_USERNAME")
 RESIDENTIAL_PASSWORD = os.getenv("THORDATA_RESIDENTIAL_PASSWORD")
 SCRAPER_TOKEN = os.getenv("THORDATA_SCRAPER_TOKEN")
@@ -84,7 +92,8 @@ def main():
     print(f"   Country:    {args.country}")
     print()
 
-    client = ThordataClient(scraper_token=SCRAPER_TOKEN)
+    pool = StickyTunnelPool(fallback_client=ThordataClient(scraper_token=SCRAPER_TOKEN))
+    tunnel = use_cassette(pool)
     url = "https://httpbin.org/ip"
 
     print(f" Making {args.requests} requests (should all show same IP):")
@@ -93,12 +102,14 @@ def main():
     ips = []
     for i in range(args.requests):
         try:
-            response = client.get(url, proxy_config=session, timeout=30)
+            started = time.perf_counter()
+            response = tunnel.get(url, session, timeout=30)
             response.raise_for_status()
-            
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
             ip = response.json().get("origin", "Unknown")
             ips.append(ip)
-            print(f"   Request {i+1}: {ip}")
+            print(f"   Request {i+1}: {ip}  ({elapsed_ms:.0f} ms)")
 
         except Exception as e:
             print(f"   Request {i+1}: [ERROR] Error - {e}")
@@ -113,6 +124,11 @@ def main():
         print(f"[WARNING]  Warning: Got {len(unique_ips)} different IPs: {unique_ips}")
         print("   This might happen if the session expired or there was an error.")
 
+    stats = pool.stats(session)
+    if stats["requests"]:
+        print(f"   Tunnels opened: {stats['tunnels']} for {stats['requests']} request(s)")
+    pool.close()
+
 
 if __name__ == "__main__":
     main()
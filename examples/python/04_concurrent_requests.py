@@ -7,6 +7,12 @@ Demonstrates maximum throughput with the proxy network.
 Usage:
     python 04_concurrent_requests.py
     python 04_concurrent_requests.py --count 20
+    python 04_concurrent_requests.py --count 50 --rate 10 --max-concurrency 5
+    python 04_concurrent_requests.py --count 100 --profile --profile-every 50
+
+--rate and --max-concurrency are shared by every process on this host using
+the same proxy product and credentials, so several workers together stay
+within the account quota.
 """
 
 import argparse
@@ -22,6 +28,17 @@ load_dotenv(Path(__file__).parent.parent.parent / ".env")
 
 from thordata import AsyncThordataClient, ThordataClient, ProxyConfig, ProxyProduct
 
+from proxy_tools import (
+    AsyncRateLimitedClient,
+    IpResult,
+    Profiler,
+    RateLimitedClient,
+    ResultBatch,
+    add_profile_args,
+    decode_ip_info,
+    use_cassette,
+)
+
 SCRAPER_TOKEN = os.getenv("THORDATA_SCRAPER_TOKEN")
 RESIDENTIAL_USERNAME = os.getenv("THORDATA_RESIDENTIAL_USERNAME")
 RESIDENTIAL_PASSWORD = os.getenv("THORDATA_RESIDENTIAL_PASSWORD")
@@ -38,26 +55,31 @@ def parse_args():
         default=5,
         help="Number of concurrent requests"
     )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=None,
+        help="Max requests/second, shared across processes on this host"
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=None,
+        help="Max in-flight requests, shared across processes on this host"
+    )
+    add_profile_args(parser)
     return parser.parse_args()
 
 
-async def fetch_ip_async(client: AsyncThordataClient, request_id: int) -> dict:
+async def fetch_ip_async(client: AsyncThordataClient, request_id: int) -> IpResult:
     """Fetch IP info for a single request using AsyncThordataClient."""
     url = "https://ipinfo.io/json"
     try:
         response = await client.get(url)
-        data = await response.json()
-        return {
-            "id": request_id,
-            "ip": data.get("ip", data.get("origin", "Unknown")),
-            "status": "success",
-        }
+        info = decode_ip_info(await response.read())
+        return IpResult(request_id, info.ip or "Unknown")
     except Exception as e:
-        return {
-            "id": request_id,
-            "ip": None,
-            "status": f"error: {e}",
-        }
+        return IpResult(request_id, error=str(e))
 
 
 def build_proxy_config() -> ProxyConfig | None:
@@ -81,25 +103,19 @@ def build_proxy_config() -> ProxyConfig | None:
     return ProxyConfig(**kwargs)
 
 
-def fetch_ip_sync(request_id: int, proxy_config: ProxyConfig | None) -> dict:
+def fetch_ip_sync(request_id: int, proxy_config: ProxyConfig | None, limits: dict) -> IpResult:
     """Fetch IP info for a single request using sync ThordataClient (for upstream proxy)."""
-    client = ThordataClient(scraper_token=SCRAPER_TOKEN)
+    client = use_cassette(ThordataClient(scraper_token=SCRAPER_TOKEN))
+    if limits:
+        client = RateLimitedClient(client, **limits)
     url = "https://ipinfo.io/json"
     try:
         response = client.get(url, proxy_config=proxy_config, timeout=30)
         response.raise_for_status()
-        data = response.json()
-        return {
-            "id": request_id,
-            "ip": data.get("ip", data.get("origin", "Unknown")),
-            "status": "success",
-        }
+        info = decode_ip_info(response.content)
+        return IpResult(request_id, info.ip or "Unknown")
     except Exception as e:
-        return {
-            "id": request_id,
-            "ip": None,
-            "status": f"error: {e}",
-        }
+        return IpResult(request_id, error=str(e))
 
 
 async def main():
@@ -112,12 +128,25 @@ async def main():
     print(f" Sending {args.count} concurrent requests...")
     print()
 
+    limits = {}
+    if args.rate:
+        limits["rate"] = args.rate
+    if args.max_concurrency:
+        limits["max_concurrent"] = args.max_concurrency
+    if limits:
+        print(f" Shared quota limits: {limits}")
+        print()
+
+    profiler = Profiler.from_args(args)
+    profiler.start()
     start_time = time.time()
 
     # If upstream proxy is configured, AsyncThordataClient currently has
     # limitations with HTTPS proxies. In that case, use sync client in threads.
     use_sync_threads = bool(UPSTREAM_PROXY)
-    results: list[dict]
+    # Results go into the columnar batch as they complete, so no list of
+    # result objects for the whole run is held alongside it.
+    batch = ResultBatch()
 
     if use_sync_threads:
         print(" Note: THORDATA_UPSTREAM_PROXY is set; using sync ThordataClient in threads.")
@@ -127,40 +156,40 @@ async def main():
             sys.exit(1)
 
         tasks = [
-            asyncio.to_thread(fetch_ip_sync, i + 1, proxy_config)
+            profiler.track(asyncio.to_thread(fetch_ip_sync, i + 1, proxy_config, limits))
             for i in range(args.count)
         ]
-        results = await asyncio.gather(*tasks)
+        for finished in asyncio.as_completed(tasks):
+            batch.add(await finished)
     else:
         async with AsyncThordataClient(scraper_token=SCRAPER_TOKEN) as client:
+            client = use_cassette(client)
+            if limits:
+                client = AsyncRateLimitedClient(client, **limits)
             tasks = [
-                fetch_ip_async(client, i + 1)
+                profiler.track(fetch_ip_async(client, i + 1))
                 for i in range(args.count)
             ]
-            results = await asyncio.gather(*tasks)
+            for finished in asyncio.as_completed(tasks):
+                batch.add(await finished)
 
     elapsed = time.time() - start_time
 
-    # Display results
-    success_count = 0
-    unique_ips = set()
-
-    for result in results:
-        status_icon = "[SUCCESS]" if result["status"] == "success" else "[ERROR]"
-        print(f"   {status_icon} Request {result['id']:2d}: {result['ip'] or result['status']}")
-        
-        if result["status"] == "success":
-            success_count += 1
-            unique_ips.add(result["ip"])
+    # The batch fills in completion order; list it by request id.
+    for result in sorted(batch, key=lambda result: result.id):
+        status_icon = "[SUCCESS]" if result.ok else "[ERROR]"
+        print(f"   {status_icon} Request {result.id:2d}: {result.ip or result.status}")
 
     print()
     print(f" Summary:")
     print(f"   Total requests:  {args.count}")
-    print(f"   Successful:      {success_count}")
-    print(f"   Unique IPs:      {len(unique_ips)}")
+    print(f"   Successful:      {batch.success_count}")
+    print(f"   Unique IPs:      {len(batch.unique_ips())}")
     print(f"   Total time:      {elapsed:.2f}s")
     print(f"   Requests/second: {args.count / elapsed:.1f}")
 
+    await profiler.close()
+
 
 if __name__ == "__main__":
     asyncio.run(main())
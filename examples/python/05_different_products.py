@@ -72,6 +72,9 @@ def main():
     print("   - Mobile: For mobile-only content and apps")
     print("   - Datacenter: Fastest, but easier to detect")
     print("   - ISP: Static IPs, great for accounts that need consistency")
+    print()
+    print("   Not sure which fits a site? 10_product_routing.py measures it per domain")
+    print("   and routes to the cheapest product that keeps working.")
 
 
 if __name__ == "__main__":
@@ -6,8 +6,12 @@ Shows how to efficiently make multiple geo-targeted requests in parallel.
 
 Usage:
     python 06_async_geo_targeting.py
+    python 06_async_geo_targeting.py --profile --profile-cprofile
+    python 06_async_geo_targeting.py --geo-db geo.tdgeo   # locate exits offline
+    python 06_async_geo_targeting.py --compress           # negotiate gzip/br/zstd, report wire bytes
 """
 
+import argparse
 import asyncio
 import os
 import sys
@@ -19,34 +23,68 @@ load_dotenv(Path(__file__).parent.parent.parent / ".env")
 
 from thordata import AsyncThordataClient, ProxyConfig, ProxyProduct
 
+from proxy_tools import (
+    AsyncCompressedClient,
+    Deadline,
+    LocationResult,
+    Profiler,
+    Timeouts,
+    add_profile_args,
+    decode_ip_info,
+    fetch_async,
+    open_geo_db,
+    use_cassette,
+)
+
 RESIDENTIAL_USERNAME = os.getenv("THORDATA_RESIDENTIAL_USERNAME")
 RESIDENTIAL_PASSWORD = os.getenv("THORDATA_RESIDENTIAL_PASSWORD")
 SCRAPER_TOKEN = os.getenv("THORDATA_SCRAPER_TOKEN")
 PROXY_HOST = os.getenv("THORDATA_PROXY_HOST")
 PROXY_PORT = os.getenv("THORDATA_PROXY_PORT")
+GEO_DB = os.getenv("THORDATA_GEO_DB")
+
+IP_ECHO_URL = "https://api.ipify.org?format=json"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Async geo-targeting demo")
+    parser.add_argument(
+        "--geo-db",
+        default=GEO_DB,
+        help="Offline geo database (.tdgeo or .mmdb) used instead of ipinfo.io"
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="Negotiate compression and report compressed vs. decoded size"
+    )
+    add_profile_args(parser)
+    return parser.parse_args()
 
 
-async def fetch_location_info(client: AsyncThordataClient, country: str, proxy_config: ProxyConfig) -> dict:
-    """Fetch location info for a specific country."""
-    url = "https://ipinfo.io/json"
+# Tight setup budget, generous read-idle budget; one 30s deadline for the whole fan-out.
+TIMEOUTS = Timeouts(connect=3, tunnel=3, tls=4, read_idle=10, total=30)
+
+
+async def fetch_location_info(client: AsyncThordataClient, country: str, proxy_config: ProxyConfig,
+                              deadline: Deadline, geo_db=None) -> LocationResult:
+    """Fetch location info for a specific country (located offline when ``geo_db`` is given)."""
+    url = IP_ECHO_URL if geo_db else "https://ipinfo.io/json"
     try:
-        response = await client.get(url, proxy_config=proxy_config, timeout=30)
-        data = await response.json()
-        return {
-            "country": country,
-            "ip": data.get("ip", "N/A"),
-            "city": data.get("city", "N/A"),
-            "region": data.get("region", "N/A"),
-            "status": "success"
-        }
+        _, body = await fetch_async(client, url, TIMEOUTS, deadline, proxy_config=proxy_config)
+        info = decode_ip_info(body)
+        if geo_db:
+            location = geo_db.lookup(info.ip)
+            if location:
+                info.country, info.region, info.city = location.country, location.region, location.city
+        return LocationResult(country, info)
     except Exception as e:
-        return {
-            "country": country,
-            "status": f"error: {e}"
-        }
+        return LocationResult(country, error=str(e))
 
 
 async def main():
+    args = parse_args()
+
     if not RESIDENTIAL_USERNAME or not RESIDENTIAL_PASSWORD:
         print("[ERROR] Error: Please set THORDATA_RESIDENTIAL_USERNAME and THORDATA_RESIDENTIAL_PASSWORD in .env")
         sys.exit(1)
@@ -61,7 +99,22 @@ async def main():
     print(f" Fetching IP info from {len(countries)} countries concurrently...")
     print()
 
-    async with AsyncThordataClient(scraper_token=SCRAPER_TOKEN) as client:
+    profiler = Profiler.from_args(args)
+    profiler.start()
+
+    deadline = TIMEOUTS.deadline()
+    geo_db = open_geo_db(args.geo_db) if args.geo_db else None
+
+    client = AsyncThordataClient(scraper_token=SCRAPER_TOKEN)
+    if args.compress and os.getenv("THORDATA_UPSTREAM_PROXY"):
+        # AsyncCompressedClient opens its own proxy connections and can't chain through an upstream proxy.
+        print("[WARNING] --compress ignored: not supported with THORDATA_UPSTREAM_PROXY")
+        args.compress = False
+    if args.compress:
+        client = AsyncCompressedClient(client)
+
+    async with client:
+        client = use_cassette(client)
         # Create proxy configs and tasks for each country
         tasks = []
         for country in countries:
@@ -80,7 +133,7 @@ async def main():
                     pass
 
             proxy_config = ProxyConfig(**kwargs)
-            tasks.append(fetch_location_info(client, country, proxy_config))
+            tasks.append(profiler.track(fetch_location_info(client, country, proxy_config, deadline, geo_db)))
 
         # Execute all concurrently
         results = await asyncio.gather(*tasks)
@@ -89,10 +142,27 @@ async def main():
     print("[SUCCESS] Results:")
     print()
     for result in results:
-        if result["status"] == "success":
-            print(f"   {result['country'].upper()}: {result['ip']} ({result['city']}, {result['region']})")
+        if result.ok:
+            info = result.info
+            line = f"   {result.target.upper()}: {info.ip or 'N/A'} ({info.city or 'N/A'}, {info.region or 'N/A'})"
+            if geo_db:
+                if not info.country:
+                    line += "  [not in geo db]"
+                elif info.country.lower() != result.target:
+                    line += f"  [MISMATCH: {info.country}]"
+            print(line)
         else:
-            print(f"   {result['country'].upper()}: [ERROR] {result['status']}")
+            print(f"   {result.target.upper()}: [ERROR] error: {result.error}")
+
+    if geo_db:
+        geo_db.close()
+
+    if args.compress:
+        stats = getattr(client, "stats", None)
+        if stats is not None and stats.requests:
+            stats.report()
+
+    await profiler.close()
 
 
 if __name__ == "__main__":
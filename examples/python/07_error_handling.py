@@ -2,7 +2,8 @@
 07 - Error Handling and Retry Logic
 
 Demonstrate proper error handling patterns when using Thordata proxy.
-Shows how to handle network errors, timeouts, and proxy failures.
+Shows how to handle network errors, timeouts, and proxy failures, and how to
+hedge slow requests instead of waiting out the full timeout.
 
 Usage:
     python 07_error_handling.py
@@ -10,15 +11,30 @@ Usage:
 
 import os
 import sys
-import time
 from pathlib import Path
+from typing import Optional
 
 from dotenv import load_dotenv
 
 load_dotenv(Path(__file__).parent.parent.parent / ".env")
 
-from thordata import ThordataClient, ProxyConfig, ProxyProduct
-from thordata.exceptions import ThordataError, ThordataNetworkError, ThordataTimeoutError
+from thordata import ProxyConfig, ProxyProduct, RetryConfig, ThordataClient
+from thordata.exceptions import (
+    ThordataError,
+    ThordataNetworkError,
+    ThordataTimeoutError,
+)
+
+from proxy_tools import (
+    Deadline,
+    DeadlineExceeded,
+    HedgedClient,
+    PhasedClient,
+    Timeouts,
+    fetch_sync,
+    retry_sync,
+    use_cassette,
+)
 
 RESIDENTIAL_USERNAME = os.getenv("THORDATA_RESIDENTIAL_USERNAME")
 RESIDENTIAL_PASSWORD = os.getenv("THORDATA_RESIDENTIAL_PASSWORD")
@@ -27,40 +43,60 @@ PROXY_HOST = os.getenv("THORDATA_PROXY_HOST")
 PROXY_PORT = os.getenv("THORDATA_PROXY_PORT")
 
 
-def make_request_with_retry(client: ThordataClient, url: str, proxy_config: ProxyConfig, max_retries: int = 3) -> dict:
-    """Make a request with retry logic."""
-    for attempt in range(1, max_retries + 1):
+# Tight setup budget (proxy connect + CONNECT tunnel + TLS), generous read-idle
+# budget for slow but healthy downloads, and one deadline for all retries.
+DEFAULT_TIMEOUTS = Timeouts(connect=3, tunnel=3, tls=4, read_idle=10, total=30)
+
+
+RETRYABLE = (ThordataTimeoutError, ThordataNetworkError, DeadlineExceeded)
+
+
+def make_request_with_retry(
+    client: ThordataClient,
+    url: str,
+    proxy_config: ProxyConfig,
+    max_retries: int = 3,
+    timeouts: Timeouts = DEFAULT_TIMEOUTS,
+    deadline: Optional[Deadline] = None,
+) -> dict:
+    """Make a request with retry logic; all attempts share one deadline."""
+    deadline = deadline or timeouts.deadline()
+    attempts = 0
+
+    def attempt() -> dict:
+        nonlocal attempts
+        attempts += 1
+        print(f"   Attempt {attempts}/{max_retries} ({deadline.remaining():.1f}s left)...", end=" ")
         try:
-            print(f"   Attempt {attempt}/{max_retries}...", end=" ")
-            response = client.get(url, proxy_config=proxy_config, timeout=10)
+            response = fetch_sync(client, url, timeouts, deadline, proxy_config=proxy_config)
             response.raise_for_status()
-            data = response.json()
-            print("[SUCCESS] Success")
-            return {"success": True, "data": data, "attempts": attempt}
-
-        except ThordataTimeoutError as e:
+            return response.json()
+        except (ThordataTimeoutError, DeadlineExceeded) as e:
             print(f"[TIMEOUT]  Timeout: {e}")
-            if attempt < max_retries:
-                wait_time = attempt * 2
-                print(f"      Waiting {wait_time}s before retry...")
-                time.sleep(wait_time)
-
+            raise
         except ThordataNetworkError as e:
             print(f" Network Error: {e}")
-            if attempt < max_retries:
-                wait_time = attempt * 2
-                print(f"      Waiting {wait_time}s before retry...")
-                time.sleep(wait_time)
+            raise
 
-        except ThordataError as e:
-            print(f"[ERROR] Thordata Error: {e}")
-            return {"success": False, "error": str(e), "attempts": attempt}
+    def on_retry(error: BaseException, wait: float) -> None:
+        print(f"      Waiting {wait:.0f}s before retry...")
 
-        except Exception as e:
-            print(f"[ERROR] Unexpected Error: {e}")
-            return {"success": False, "error": str(e), "attempts": attempt}
+    try:
+        # Backoff of 2s, 4s, ...; stop early once a retry would no longer fit a setup phase.
+        data = retry_sync(attempt, deadline, retries=max_retries - 1, backoff=2.0, retry_on=RETRYABLE,
+                          min_attempt=timeouts.setup, on_retry=on_retry)
+    except RETRYABLE as e:
+        print("      Retries or deadline budget exhausted, giving up.")
+        return {"success": False, "error": str(e), "attempts": attempts}
+    except ThordataError as e:
+        print(f"[ERROR] Thordata Error: {e}")
+        return {"success": False, "error": str(e), "attempts": attempts}
+    except Exception as e:
+        print(f"[ERROR] Unexpected Error: {e}")
+        return {"success": False, "error": str(e), "attempts": attempts}
 
-    return {"success": False, "error": "Max retries exceeded", "attempts": max_retries}
+    print("[SUCCESS] Success")
+    return {"success": True, "data": data, "attempts": attempts}
 
 
 def main():
@@ -72,7 +108,13 @@ def main():
         print("[ERROR] Error: Please set THORDATA_SCRAPER_TOKEN in .env")
         sys.exit(1)
 
-    client = ThordataClient(scraper_token=SCRAPER_TOKEN)
+    # Retries are done by make_request_with_retry() under a shared deadline,
+    # so turn off the SDK's own retries (they would multiply the timeout).
+    # PhasedClient lets fetch_sync() enforce the setup and read-idle budgets
+    # separately and the deadline mid-body; the SDK client alone takes one
+    # number. Calls with a plain timeout pass straight through to the SDK.
+    sdk_client = ThordataClient(scraper_token=SCRAPER_TOKEN, retry_config=RetryConfig(max_retries=0))
+    client = use_cassette(PhasedClient(sdk_client))
     kwargs: dict = {
         "username": RESIDENTIAL_USERNAME,
         "password": RESIDENTIAL_PASSWORD,
@@ -124,6 +166,20 @@ def main():
         print(f"   [ERROR] Error: {e}")
     print()
 
+    # Test 4: Hedged requests (cut tail latency on slow residential exits)
+    print("Test 4: Hedged requests")
+    hedged = HedgedClient(client, percentile=95, budget_ratio=0.2, initial_delay=3.0)
+    for i in range(5):
+        try:
+            response = hedged.get(url, proxy_config=proxy_config, timeout=10)
+            print(f"   Request {i + 1}: {response.json().get('ip', 'N/A')}")
+        except Exception as e:
+            print(f"   Request {i + 1}: [ERROR] {e}")
+    stats = hedged.stats
+    print(f"   Hedges sent: {stats.hedges}, won: {stats.hedge_wins}, "
+          f"extra traffic: {stats.extra_traffic:.0%}")
+    print()
+
     print("=" * 60)
     print()
     print(" Best Practices:")
@@ -131,6 +187,8 @@ def main():
     print("   - Implement retry logic with exponential backoff")
     print("   - Handle Thordata-specific exceptions (ThordataError, ThordataNetworkError, etc.)")
     print("   - Set appropriate timeouts based on your use case")
+    print("   - Budget timeouts per phase and share one deadline across retries")
+    print("   - Hedge slow requests (within a budget) rather than waiting out the timeout")
     print("   - Log errors for debugging and monitoring")
 
 
@@ -0,0 +1,273 @@
+"""
+08 - Resumable Crawl with a Persistent Job Queue
+
+Run a long crawl from a SQLite-backed job queue. Workers claim jobs in
+batches and record results in batches, so a crash or Ctrl+C never costs
+more than the jobs in flight: run the script again and it picks up exactly
+where it stopped, without paying for the same bandwidth twice. The next
+batch is claimed while the workers are still busy with the last one.
+
+Workers are named <host>-<pid>. On start, jobs claimed by a worker on this
+host whose process is gone are requeued right away; claims of live workers
+(here or on other hosts) are left alone until their lease expires.
+
+Usage:
+    python 08_resumable_crawl.py
+    python 08_resumable_crawl.py --db crawl.db --repeat 20 --workers 10
+    python 08_resumable_crawl.py --urls-file urls.txt --countries us,de,jp
+    python 08_resumable_crawl.py --reclaim otherhost-4242   # take over a dead remote worker's jobs
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv(Path(__file__).parent.parent.parent / ".env")
+
+from thordata import AsyncThordataClient, ProxyConfig, ProxyProduct
+
+from proxy_tools import JobQueue, use_cassette
+from proxy_tools.records import loads
+
+SCRAPER_TOKEN = os.getenv("THORDATA_SCRAPER_TOKEN")
+RESIDENTIAL_USERNAME = os.getenv("THORDATA_RESIDENTIAL_USERNAME")
+RESIDENTIAL_PASSWORD = os.getenv("THORDATA_RESIDENTIAL_PASSWORD")
+PROXY_HOST = os.getenv("THORDATA_PROXY_HOST")
+PROXY_PORT = os.getenv("THORDATA_PROXY_PORT")
+CRAWL_DB = os.getenv("THORDATA_CRAWL_DB", "crawl.db")
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}"
+
+# Client errors that won't change on retry; anything else is retried.
+RETRYABLE_STATUSES = {407, 408, 425, 429}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Resumable crawl demo")
+    parser.add_argument("--db", default=CRAWL_DB, help="SQLite job database (default: $THORDATA_CRAWL_DB or crawl.db)")
+    parser.add_argument("--urls-file", default=None, help="File with one URL per line")
+    parser.add_argument(
+        "--countries", "-c",
+        default="us,de,jp,gb,fr",
+        help="Comma-separated countries; each URL is queued once per country"
+    )
+    parser.add_argument(
+        "--repeat", "-r",
+        type=int,
+        default=2,
+        help="Queue each URL/country pair this many times (distinct jobs)"
+    )
+    parser.add_argument("--workers", "-w", type=int, default=5, help="Concurrent requests")
+    parser.add_argument("--batch", "-b", type=int, default=20, help="Jobs claimed/recorded per DB round trip")
+    parser.add_argument(
+        "--reclaim",
+        action="append",
+        default=[],
+        metavar="WORKER",
+        help="Requeue the claims of a worker known to be dead (repeatable)"
+    )
+    return parser.parse_args()
+
+
+def build_proxy_config(targeting: dict) -> ProxyConfig:
+    """Combine stored targeting options with credentials from the environment."""
+    kwargs: dict = {
+        "username": RESIDENTIAL_USERNAME,
+        "password": RESIDENTIAL_PASSWORD,
+        "product": ProxyProduct(targeting.get("product", "residential")),
+    }
+    for field in ("country", "state", "city"):
+        if targeting.get(field):
+            kwargs[field] = targeting[field]
+    if PROXY_HOST:
+        kwargs["host"] = PROXY_HOST
+    if PROXY_PORT:
+        try:
+            kwargs["port"] = int(PROXY_PORT)
+        except ValueError:
+            pass
+    return ProxyConfig(**kwargs)
+
+
+def seed_jobs(queue: JobQueue, args) -> int:
+    if args.urls_file:
+        urls = [line.strip() for line in Path(args.urls_file).read_text().splitlines() if line.strip()]
+    else:
+        urls = ["https://ipinfo.io/json"]
+    countries = [c.strip() for c in args.countries.split(",") if c.strip()]
+
+    jobs = []
+    for url in urls:
+        for country in countries:
+            for n in range(args.repeat):
+                # "n" keeps repeated checks distinct while staying idempotent on re-runs.
+                jobs.append((url, {"product": "residential", "country": country, "n": n}))
+    return queue.add_many(jobs)
+
+
+def pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        return True  # no safe probe (os.kill terminates on Windows); rely on the lease
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def dead_local_workers(queue: JobQueue) -> list:
+    """Workers on this host that hold claims but whose process no longer runs."""
+    prefix = f"{socket.gethostname()}-"
+    dead = []
+    for worker in queue.claimed_workers():
+        if not worker or not worker.startswith(prefix):
+            continue
+        pid = worker[len(prefix):]
+        # Our own id can only be stale here: this process hasn't claimed anything yet.
+        if worker == WORKER_ID or (pid.isdigit() and not pid_alive(int(pid))):
+            dead.append(worker)
+    return dead
+
+
+async def fetch_job(client: AsyncThordataClient, job) -> tuple:
+    """Returns ``(key, result, error, retryable)``."""
+    try:
+        response = await client.get(job.url, proxy_config=build_proxy_config(job.proxy), timeout=30)
+        body = await response.read()
+    except Exception as e:
+        return job.key, None, str(e), True
+
+    status = response.status
+    if status >= 400:
+        retryable = status >= 500 or status in RETRYABLE_STATUSES
+        return job.key, None, f"HTTP {status}", retryable
+
+    result = {"status": status, "bytes": len(body)}
+    if "json" in response.headers.get("Content-Type", ""):
+        try:
+            data = loads(body)
+        except ValueError:
+            data = None
+        if isinstance(data, dict):
+            result.update(ip=data.get("ip"), country=data.get("country"))
+    return job.key, result, None, False
+
+
+async def run_queue(queue: JobQueue, args) -> None:
+    worker_id = WORKER_ID
+    # Claimed jobs wait here for a free worker. The next batch is claimed as soon
+    # as there is room for it, so one slow job never leaves the other workers idle.
+    todo: asyncio.Queue = asyncio.Queue(maxsize=args.batch)
+    outcomes: asyncio.Queue = asyncio.Queue()
+    recorded = asyncio.Event()
+    unrecorded = 0  # claimed by this run, outcome not written back yet
+
+    async def feed() -> None:
+        nonlocal unrecorded
+        while True:
+            recorded.clear()
+            jobs = await asyncio.to_thread(queue.claim_batch, args.batch, worker_id)
+            if jobs:
+                unrecorded += len(jobs)
+                for job in jobs:
+                    await todo.put(job)
+            elif unrecorded or recorded.is_set():
+                # Jobs still out may fail and become claimable again.
+                await recorded.wait()
+            else:
+                break
+        for _ in range(args.workers):
+            await todo.put(None)
+
+    async def work(client) -> None:
+        while True:
+            job = await todo.get()
+            if job is None:
+                return
+            await outcomes.put(await fetch_job(client, job))
+
+    async def record() -> None:
+        nonlocal unrecorded
+        finished = False
+        while not finished:
+            # Whatever finished while the last batch was being written goes out
+            # together: one DB round trip for up to a batch of outcomes.
+            batch = [await outcomes.get()]
+            while len(batch) < args.batch and not outcomes.empty():
+                batch.append(outcomes.get_nowait())
+            if batch[-1] is None:
+                finished = True
+                batch.pop()
+            if not batch:
+                continue
+
+            done = [(key, result) for key, result, error, _ in batch if error is None]
+            retry = [(key, error) for key, _, error, retryable in batch if error is not None and retryable]
+            permanent = [(key, error) for key, _, error, retryable in batch if error is not None and not retryable]
+            failed = retry + permanent
+            await asyncio.to_thread(queue.complete_many, done)
+            await asyncio.to_thread(queue.fail_many, retry)
+            await asyncio.to_thread(queue.fail_many, permanent, 0)  # e.g. 404: don't pay for it again
+            unrecorded -= len(batch)
+            recorded.set()
+
+            stats = await asyncio.to_thread(queue.stats)
+            print(f"   Batch: {len(done)} ok, {len(failed)} failed | "
+                  f"done {stats['done']}, pending {stats['pending']}, failed {stats['failed']}")
+
+    async with AsyncThordataClient(scraper_token=SCRAPER_TOKEN) as client:
+        client = use_cassette(client)
+        recorder = asyncio.ensure_future(record())
+        await asyncio.gather(feed(), *(work(client) for _ in range(args.workers)))
+        await outcomes.put(None)
+        await recorder
+
+
+async def main():
+    args = parse_args()
+
+    if not SCRAPER_TOKEN:
+        print("[ERROR] Please set THORDATA_SCRAPER_TOKEN in .env")
+        sys.exit(1)
+
+    if not RESIDENTIAL_USERNAME or not RESIDENTIAL_PASSWORD:
+        print("[ERROR] Please set THORDATA_RESIDENTIAL_USERNAME and THORDATA_RESIDENTIAL_PASSWORD in .env")
+        sys.exit(1)
+
+    with JobQueue(args.db) as queue:
+        added = seed_jobs(queue, args)
+        for worker in dead_local_workers(queue) + args.reclaim:
+            reclaimed = queue.requeue_claimed(worker)
+            if reclaimed:
+                print(f" Requeued {reclaimed} job(s) left claimed by {worker}")
+
+        stats = queue.stats()
+        print(f" Job queue: {args.db}")
+        print(f"   New jobs:  {added}")
+        print(f"   Pending:   {stats['pending']}")
+        print(f"   Done:      {stats['done']} (skipped on this run)")
+        print()
+
+        try:
+            await run_queue(queue, args)
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            print()
+            print("[WARNING]  Interrupted - run again to resume.")
+            return
+
+        stats = queue.stats()
+        print()
+        print(" Summary:")
+        print(f"   Done:    {stats['done']}")
+        print(f"   Failed:  {stats['failed']}")
+        print(f"   Pending: {stats['pending'] + stats['claimed']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
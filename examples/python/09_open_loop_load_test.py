@@ -0,0 +1,140 @@
+"""
+09 - Open-Loop Load Test
+
+Find the real sustainable request rate of your proxy setup. Unlike
+04_concurrent_requests.py (closed loop: fire N, wait), requests here are sent
+on a fixed or Poisson schedule regardless of how fast responses come back,
+and latency is measured from the *intended* send time, so queueing delay is
+not hidden (coordinated-omission correction).
+
+Usage:
+    python 09_open_loop_load_test.py
+    python 09_open_loop_load_test.py --rate 20 --duration 60 --poisson
+    python 09_open_loop_load_test.py --profile-spec "5:20,5-50:60,50:20" --client sync
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv(Path(__file__).parent.parent.parent / ".env")
+
+from thordata import AsyncThordataClient, ProxyConfig, ProxyProduct, ThordataClient
+
+from proxy_tools import (
+    RateProfile,
+    run_open_loop_async,
+    run_open_loop_sync,
+    use_cassette,
+)
+
+SCRAPER_TOKEN = os.getenv("THORDATA_SCRAPER_TOKEN")
+RESIDENTIAL_USERNAME = os.getenv("THORDATA_RESIDENTIAL_USERNAME")
+RESIDENTIAL_PASSWORD = os.getenv("THORDATA_RESIDENTIAL_PASSWORD")
+PROXY_HOST = os.getenv("THORDATA_PROXY_HOST")
+PROXY_PORT = os.getenv("THORDATA_PROXY_PORT")
+UPSTREAM_PROXY = os.getenv("THORDATA_UPSTREAM_PROXY")
+
+URL = "https://ipinfo.io/json"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Open-loop load test")
+    parser.add_argument("--rate", "-r", type=float, default=2.0, help="Constant arrival rate (req/s)")
+    parser.add_argument("--duration", "-d", type=float, default=10.0, help="Test duration for --rate (seconds)")
+    parser.add_argument(
+        "--profile-spec",
+        default=None,
+        help="Rate stages, e.g. '5:20,5-50:60' (overrides --rate/--duration)"
+    )
+    parser.add_argument("--poisson", action="store_true", help="Poisson arrivals instead of evenly spaced")
+    parser.add_argument(
+        "--client",
+        choices=["async", "sync"],
+        default="sync" if UPSTREAM_PROXY else "async",
+        help="Client to load (sync uses a thread pool)"
+    )
+    parser.add_argument("--max-in-flight", type=int, default=200, help="Cap on outstanding requests")
+    parser.add_argument("--window", type=float, default=5.0, help="Reporting window (seconds)")
+    parser.add_argument("--timeout", type=int, default=30, help="Per-request timeout (seconds)")
+    return parser.parse_args()
+
+
+def build_proxy_config() -> ProxyConfig:
+    kwargs: dict = {
+        "username": RESIDENTIAL_USERNAME,
+        "password": RESIDENTIAL_PASSWORD,
+        "product": ProxyProduct.RESIDENTIAL,
+    }
+    if PROXY_HOST:
+        kwargs["host"] = PROXY_HOST
+    if PROXY_PORT:
+        try:
+            kwargs["port"] = int(PROXY_PORT)
+        except ValueError:
+            pass
+    return ProxyConfig(**kwargs)
+
+
+async def main():
+    args = parse_args()
+
+    if not SCRAPER_TOKEN:
+        print("[ERROR] Please set THORDATA_SCRAPER_TOKEN in .env")
+        sys.exit(1)
+
+    if not RESIDENTIAL_USERNAME or not RESIDENTIAL_PASSWORD:
+        print("[ERROR] Please set THORDATA_RESIDENTIAL_USERNAME and THORDATA_RESIDENTIAL_PASSWORD in .env")
+        sys.exit(1)
+
+    if args.profile_spec:
+        profile = RateProfile.parse(args.profile_spec)
+    else:
+        profile = RateProfile.constant(args.rate, args.duration)
+
+    proxy_config = build_proxy_config()
+
+    print(" Open-loop load test")
+    print(f"   Client:    {args.client}")
+    print(f"   Arrivals:  {'poisson' if args.poisson else 'constant'}")
+    print("   Stages:    " + ", ".join(
+        f"{s.start_rate:g}" + (f"->{s.end_rate:g}" if s.end_rate != s.start_rate else "") + f" req/s for {s.seconds:g}s"
+        for s in profile.stages
+    ))
+    print(f"   Duration:  {profile.duration:g}s")
+
+    if args.client == "sync":
+        client = use_cassette(ThordataClient(scraper_token=SCRAPER_TOKEN))
+
+        def send():
+            response = client.get(URL, proxy_config=proxy_config, timeout=args.timeout)
+            response.raise_for_status()
+
+        result = await asyncio.to_thread(
+            run_open_loop_sync, send, profile, args.poisson, args.max_in_flight, args.window
+        )
+    else:
+        async with AsyncThordataClient(scraper_token=SCRAPER_TOKEN) as client:
+            client = use_cassette(client)
+
+            async def send():
+                response = await client.get(URL, proxy_config=proxy_config, timeout=args.timeout)
+                response.raise_for_status()
+                await response.read()
+
+            result = await run_open_loop_async(
+                send, profile, args.poisson, args.max_in_flight, args.window
+            )
+
+    result.report(profile)
+    print()
+    print(" Tip: the sustainable rate is the highest window where 'achieved' keeps up")
+    print("      with 'target' and p99 stays flat; past it, corrected latency climbs.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
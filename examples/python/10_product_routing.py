@@ -0,0 +1,142 @@
+"""
+10 - Automatic Product Routing
+
+Let the proxy product be chosen per target domain from measured success rate,
+latency and relative cost, instead of hard-coding one. Domains that work on
+cheap, fast datacenter IPs move there automatically; failed requests fall
+back to residential on the spot.
+
+Usage:
+    python 10_product_routing.py
+    python 10_product_routing.py --rounds 20 --state routing.json
+    python 10_product_routing.py --url https://example.com/ --url https://httpbin.org/ip
+    python 10_product_routing.py --costs datacenter=1,isp=1.5,residential=3,mobile=6
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv(Path(__file__).parent.parent.parent / ".env")
+
+from thordata import ProxyConfig, ProxyProduct, ThordataClient
+
+from proxy_tools import ProductRouter, RoutedClient, use_cassette
+
+RESIDENTIAL_USERNAME = os.getenv("THORDATA_RESIDENTIAL_USERNAME")
+RESIDENTIAL_PASSWORD = os.getenv("THORDATA_RESIDENTIAL_PASSWORD")
+SCRAPER_TOKEN = os.getenv("THORDATA_SCRAPER_TOKEN")
+PROXY_HOST = os.getenv("THORDATA_PROXY_HOST")
+PROXY_PORT = os.getenv("THORDATA_PROXY_PORT")
+CASSETTE = os.getenv("THORDATA_CASSETTE")
+
+DEFAULT_URLS = [
+    "https://ipinfo.io/json",
+    "https://httpbin.org/ip",
+    "https://example.com/",
+]
+
+
+def parse_costs(spec: str) -> dict:
+    costs = {}
+    for part in spec.split(","):
+        name, _, value = part.partition("=")
+        costs[name.strip().lower()] = float(value)
+    return costs
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Route each domain to the best proxy product")
+    parser.add_argument("--url", action="append", default=None, help="Target URL (repeatable)")
+    parser.add_argument("--rounds", "-n", type=int, default=8, help="Requests per URL")
+    parser.add_argument("--country", "-c", default="us", help="Target country code")
+    parser.add_argument(
+        "--costs",
+        type=parse_costs,
+        default=None,
+        help="Relative per-GB cost, e.g. 'datacenter=1,residential=4'"
+    )
+    parser.add_argument("--min-success", type=float, default=0.9, help="Success rate a product must keep")
+    parser.add_argument("--explore", type=float, default=0.05, help="Fraction of requests that try another product")
+    parser.add_argument(
+        "--seed",
+        type=int,
+        # Record and replay must explore the same way or requests won't match the cassette.
+        default=0 if CASSETTE else None,
+        help="Seed for exploration (fixed automatically when THORDATA_CASSETTE is set)"
+    )
+    parser.add_argument("--state", default=None, help="JSON file to load/save learned stats across runs")
+    parser.add_argument("--timeout", type=int, default=30, help="Per-request timeout (seconds)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if not RESIDENTIAL_USERNAME or not RESIDENTIAL_PASSWORD:
+        print("[ERROR] Please set THORDATA_RESIDENTIAL_USERNAME and THORDATA_RESIDENTIAL_PASSWORD in .env")
+        sys.exit(1)
+
+    if not SCRAPER_TOKEN:
+        print("[ERROR] Please set THORDATA_SCRAPER_TOKEN in .env")
+        sys.exit(1)
+
+    proxy_kwargs = {
+        "username": RESIDENTIAL_USERNAME,
+        "password": RESIDENTIAL_PASSWORD,
+        "product": ProxyProduct.RESIDENTIAL,
+        "country": args.country,
+    }
+    # Used while residential is picked; switching product resets host and port.
+    if PROXY_HOST:
+        proxy_kwargs["host"] = PROXY_HOST
+    if PROXY_PORT:
+        try:
+            proxy_kwargs["port"] = int(PROXY_PORT)
+        except ValueError:
+            pass
+
+    base_config = ProxyConfig(**proxy_kwargs)
+
+    router = ProductRouter(costs=args.costs, min_success=args.min_success, explore=args.explore, seed=args.seed)
+    if args.state and Path(args.state).exists():
+        router.load(args.state)
+        print(f" Loaded routing stats from {args.state}")
+
+    client = RoutedClient(use_cassette(ThordataClient(scraper_token=SCRAPER_TOKEN)), router)
+    urls = args.url or DEFAULT_URLS
+
+    print(f" Routing {len(urls)} URL(s) x {args.rounds} rounds")
+    print()
+
+    failures = 0
+    for round_no in range(1, args.rounds + 1):
+        for url in urls:
+            started = time.perf_counter()
+            try:
+                response = client.get(url, proxy_config=base_config, timeout=args.timeout)
+                status = response.status_code
+            except Exception as e:
+                status = type(e).__name__
+                failures += 1
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            print(f"   [{round_no:>2}] {url:<32} {status!s:<6} {elapsed_ms:>6.0f} ms")
+
+    router.report()
+
+    if args.state:
+        router.save(args.state)
+        print()
+        print(f" Saved routing stats to {args.state}")
+
+    if failures:
+        print()
+        print(f"[WARNING] {failures} request(s) failed even on the fallback product")
+
+
+if __name__ == "__main__":
+    main()
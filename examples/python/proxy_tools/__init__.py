@@ -0,0 +1,103 @@
+"""
+Shared helpers used by the numbered examples.
+
+The examples stay copy-paste friendly; anything that has to be shared between
+scripts (or between processes) lives here so each script only needs a couple
+of lines to opt in.
+"""
+
+from .cassette import Cassette, CassetteMiss, use_cassette
+from .compression import (
+    AsyncCompressedClient,
+    CompressedClient,
+    CompressionInfo,
+    CompressionStats,
+)
+from .geo_db import GeoDatabase, GeoLocation, build_geo_db, open_geo_db
+from .hedging import AsyncHedgedClient, HedgedClient, Hedger
+from .job_queue import Job, JobQueue, job_key
+from .loadgen import (
+    LatencyHistogram,
+    LoadResult,
+    RateProfile,
+    run_open_loop_async,
+    run_open_loop_sync,
+)
+from .profiling import Profiler, add_profile_args
+from .rate_limit import (
+    AsyncRateLimitedClient,
+    QuotaLimiter,
+    RateLimitedClient,
+    SharedConcurrencyLimit,
+    SharedTokenBucket,
+    quota_key,
+)
+from .records import (
+    JSON_BACKEND,
+    IpInfo,
+    IpResult,
+    LocationResult,
+    ResultBatch,
+    decode_ip_info,
+)
+from .routing import AsyncRoutedClient, ProductRouter, RoutedClient
+from .session_pool import StickyTunnelPool
+from .timeouts import (
+    Deadline,
+    DeadlineExceeded,
+    PhasedClient,
+    Timeouts,
+    fetch_async,
+    fetch_sync,
+    retry_sync,
+)
+
+__all__ = [
+    "JSON_BACKEND",
+    "AsyncCompressedClient",
+    "AsyncHedgedClient",
+    "AsyncRateLimitedClient",
+    "AsyncRoutedClient",
+    "Cassette",
+    "CassetteMiss",
+    "CompressedClient",
+    "CompressionInfo",
+    "CompressionStats",
+    "Deadline",
+    "DeadlineExceeded",
+    "GeoDatabase",
+    "GeoLocation",
+    "HedgedClient",
+    "Hedger",
+    "IpInfo",
+    "IpResult",
+    "Job",
+    "JobQueue",
+    "LatencyHistogram",
+    "LoadResult",
+    "LocationResult",
+    "PhasedClient",
+    "ProductRouter",
+    "Profiler",
+    "QuotaLimiter",
+    "RateLimitedClient",
+    "RateProfile",
+    "ResultBatch",
+    "RoutedClient",
+    "SharedConcurrencyLimit",
+    "SharedTokenBucket",
+    "StickyTunnelPool",
+    "Timeouts",
+    "add_profile_args",
+    "build_geo_db",
+    "decode_ip_info",
+    "fetch_async",
+    "fetch_sync",
+    "job_key",
+    "open_geo_db",
+    "quota_key",
+    "retry_sync",
+    "run_open_loop_async",
+    "run_open_loop_sync",
+    "use_cassette",
+]
@@ -0,0 +1,69 @@
+"""
+Direct urllib3 connections to the proxy.
+
+``CompressedClient``, ``PhasedClient`` and ``StickyTunnelPool`` talk to the
+proxy themselves instead of through ``ThordataClient``: they need the raw
+body, separate connect/read timeouts or their own tunnel lifetime. This
+module holds what they share. Upstream-proxy chaining and SOCKS stay with
+the SDK, so callers check :func:`can_connect_directly` first.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any
+
+import requests
+import urllib3
+from requests.structures import CaseInsensitiveDict
+
+
+def can_connect_directly(proxy_config: Any) -> bool:
+    """False when the SDK has to carry the request (upstream proxy or SOCKS)."""
+    if proxy_config is None or os.getenv("THORDATA_UPSTREAM_PROXY"):
+        return False
+    return not proxy_config.build_proxy_endpoint().startswith("socks")
+
+
+def new_proxy_manager(proxy_config: Any, maxsize: int = 10, block: bool = False) -> urllib3.ProxyManager:
+    """A ``ProxyManager`` for the config's endpoint, authenticating with its credentials."""
+    return urllib3.ProxyManager(
+        proxy_config.build_proxy_endpoint(),
+        proxy_headers=urllib3.make_headers(proxy_basic_auth=proxy_config.build_proxy_basic_auth()),
+        num_pools=10,
+        maxsize=maxsize,
+        block=block,
+    )
+
+
+class ProxyManagers:
+    """One kept-alive ``ProxyManager`` per proxy endpoint and credentials; thread-safe."""
+
+    def __init__(self) -> None:
+        self._managers: dict[str, urllib3.ProxyManager] = {}
+        self._lock = threading.Lock()
+
+    def get(self, proxy_config: Any) -> urllib3.ProxyManager:
+        key = f"{proxy_config.build_proxy_endpoint()}|{proxy_config.build_proxy_basic_auth()}"
+        with self._lock:
+            manager = self._managers.get(key)
+            if manager is None:
+                manager = self._managers[key] = new_proxy_manager(proxy_config)
+            return manager
+
+    def close(self) -> None:
+        with self._lock:
+            for manager in self._managers.values():
+                manager.clear()
+            self._managers.clear()
+
+
+def to_response(status: int, url: str, content: bytes, headers: Any) -> requests.Response:
+    """A ``requests.Response`` like the ones ``ThordataClient.get`` returns."""
+    response = requests.Response()
+    response.status_code = int(status)
+    response._content = content
+    response.url = url
+    response.headers = CaseInsensitiveDict(dict(headers or {}))
+    return response
@@ -0,0 +1,381 @@
+"""
+Record/replay traffic cassettes for deterministic, offline performance tests.
+
+Record mode wraps a real client and appends every request/response pair,
+together with its timing, to a cassette: gzip-compressed JSON lines, one
+interaction per line. Replay mode serves the same responses back through the
+same ``get`` interface, sleeping for the recorded latency (optionally scaled),
+so timing runs are reproducible without proxies or third-party sites.
+
+Interactions are matched by method, URL and proxy targeting (product and
+geo, never the random sticky session id), in recorded order.
+
+The examples opt in through the environment:
+
+    THORDATA_CASSETTE=cassettes/04.jsonl.gz THORDATA_CASSETTE_MODE=record python 04_concurrent_requests.py
+    THORDATA_CASSETTE=cassettes/04.jsonl.gz THORDATA_CASSETTE_MODE=replay python 04_concurrent_requests.py
+
+``THORDATA_CASSETTE_LATENCY_SCALE`` scales replayed latencies (0 disables
+sleeping, 1 is the recorded timing).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import builtins
+import gzip
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Headers worth keeping; everything else is noise for replay. Bodies are
+# stored decoded, so content-encoding and content-length would be wrong.
+_KEEP_HEADERS = ("content-type", "location", "retry-after")
+_TARGETING = ("product", "country", "state", "city", "asn")
+
+
+class CassetteMiss(LookupError):
+    """Replay found no recorded interaction for a request."""
+
+
+class ReplayedError(Exception):
+    """A recorded exception whose original type could not be recreated."""
+
+
+def _match_key(method: str, url: str, proxy_config: Any) -> str:
+    targeting = []
+    for name in _TARGETING:
+        value = getattr(proxy_config, name, None)
+        targeting.append(str(getattr(value, "value", value) or ""))
+    return "|".join([method.upper(), url, *targeting])
+
+
+def _proxy_from_call(args: tuple, kwargs: dict) -> Any:
+    # ThordataClient.get(url, proxy_config=...) or StickyTunnelPool.get(url, session)
+    return kwargs.get("proxy_config", args[0] if args else None)
+
+
+def _error_type(module_name: str | None, qualname: str) -> type | None:
+    # Never import the recorded module name: a cassette file must not be able to run code.
+    candidates: list = []
+    if module_name and module_name in sys.modules:
+        candidates.append(sys.modules[module_name])
+    else:
+        try:
+            from thordata import exceptions
+            candidates.append(exceptions)
+        except ImportError:
+            pass
+        candidates.append(builtins)
+    for module in candidates:
+        error_type: Any = module
+        for part in qualname.split("."):
+            error_type = getattr(error_type, part, None)
+        if isinstance(error_type, type) and issubclass(error_type, Exception):
+            return error_type
+    return None
+
+
+def _restore_error(record: dict) -> Exception:
+    name, message = record["error"], record["message"]
+    error_type = _error_type(record.get("module"), name)
+    if error_type is not None:
+        try:
+            return error_type(message)
+        except TypeError:
+            pass
+    return ReplayedError(f"{name}: {message}")
+
+
+class Cassette:
+    """An on-disk list of interactions (gzip JSON lines)."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._queues: dict[str, deque] | None = None
+
+    # -- recording ---------------------------------------------------------
+
+    def start_recording(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(self.path, "wt", encoding="utf-8"):
+            pass
+        self._origin = time.perf_counter()
+
+    def append(self, record: dict) -> None:
+        record["at"] = round(time.perf_counter() - self._origin, 6)
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        # One gzip member per line keeps appends cheap and crash-safe.
+        with self._lock, gzip.open(self.path, "at", encoding="utf-8") as fh:
+            fh.write(line)
+
+    def record_response(self, key: str, status: int, headers: Any, body: bytes,
+                        elapsed: float, body_elapsed: float = 0.0) -> None:
+        kept = {k.lower(): v for k, v in dict(headers or {}).items() if k.lower() in _KEEP_HEADERS}
+        self.append({
+            "key": key,
+            "status": status,
+            "headers": kept,
+            "body": base64.b64encode(body).decode("ascii"),
+            "elapsed": round(elapsed, 6),
+            "body_elapsed": round(body_elapsed, 6),
+        })
+
+    def record_error(self, key: str, error: BaseException, elapsed: float) -> None:
+        self.append({
+            "key": key,
+            "error": type(error).__qualname__,
+            "module": type(error).__module__,
+            "message": str(error),
+            "elapsed": round(elapsed, 6),
+        })
+
+    # -- replay ------------------------------------------------------------
+
+    def load(self) -> None:
+        queues: dict[str, deque] = defaultdict(deque)
+        with gzip.open(self.path, "rt", encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    record = json.loads(line)
+                    queues[record["key"]].append(record)
+        self._queues = queues
+
+    def next(self, key: str) -> dict:
+        if self._queues is None:
+            self.load()
+        with self._lock:
+            queue = self._queues.get(key)
+            if not queue:
+                raise CassetteMiss(f"no recorded interaction left for {key}")
+            return queue.popleft()
+
+    def __len__(self) -> int:
+        if self._queues is None:
+            self.load()
+        return sum(len(q) for q in self._queues.values())
+
+
+def _sync_response(record: dict, url: str) -> requests.Response:
+    response = requests.Response()
+    response.status_code = record["status"]
+    response._content = base64.b64decode(record["body"])
+    response.url = url
+    response.headers = CaseInsensitiveDict(record["headers"])
+    return response
+
+
+class RecordingClient:
+    """Wraps a sync client (or ``StickyTunnelPool``) and records every ``get``."""
+
+    def __init__(self, client: Any, cassette: Cassette):
+        self._client = client
+        self.cassette = cassette
+
+    def get(self, url: str, *args: Any, **kwargs: Any) -> Any:
+        key = _match_key("GET", url, _proxy_from_call(args, kwargs))
+        started = time.perf_counter()
+        try:
+            response = self._client.get(url, *args, **kwargs)
+        except Exception as e:
+            self.cassette.record_error(key, e, time.perf_counter() - started)
+            raise
+        self.cassette.record_response(
+            key, response.status_code, response.headers, response.content, time.perf_counter() - started
+        )
+        return response
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+
+class ReplayClient:
+    """Serves recorded responses through the sync ``get`` interface."""
+
+    def __init__(self, cassette: Cassette, latency_scale: float = 1.0):
+        self.cassette = cassette
+        self.latency_scale = latency_scale
+
+    def get(self, url: str, *args: Any, **kwargs: Any) -> requests.Response:
+        record = self.cassette.next(_match_key("GET", url, _proxy_from_call(args, kwargs)))
+        delay = (record["elapsed"] + record.get("body_elapsed", 0.0)) * self.latency_scale
+        if delay > 0:
+            time.sleep(delay)
+        if "error" in record:
+            raise _restore_error(record)
+        return _sync_response(record, url)
+
+    def close(self) -> None:
+        pass
+
+
+class _ReplayStream:
+    def __init__(self, body: bytes, delay: float):
+        self._body = body
+        self._delay = delay
+
+    async def readany(self) -> bytes:
+        if self._delay > 0:
+            await asyncio.sleep(self._delay)
+            self._delay = 0.0
+        body, self._body = self._body, b""
+        return body
+
+    async def read(self, n: int = -1) -> bytes:
+        return await self.readany()
+
+    async def iter_any(self):
+        chunk = await self.readany()
+        if chunk:
+            yield chunk
+
+    async def iter_chunked(self, n: int):
+        async for chunk in self.iter_any():
+            yield chunk
+
+
+class AsyncReplayResponse:
+    """Just enough of ``aiohttp.ClientResponse`` for the examples."""
+
+    def __init__(self, record: dict, url: str, body_delay: float):
+        self.status = record["status"]
+        self.headers = CaseInsensitiveDict(record["headers"])
+        self.url = url
+        self._body = base64.b64decode(record["body"])
+        self.content = _ReplayStream(self._body, body_delay)
+
+    async def read(self) -> bytes:
+        await self.content.readany()
+        return self._body
+
+    async def text(self, encoding: str = "utf-8") -> str:
+        return (await self.read()).decode(encoding)
+
+    async def json(self, **kwargs: Any) -> Any:
+        return json.loads(await self.read())
+
+    def raise_for_status(self) -> None:
+        if self.status >= 400:
+            raise ReplayedError(f"HTTP {self.status} for {self.url}")
+
+    def release(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class _RecordedAsyncResponse:
+    """The real response, with ``content`` re-serving the body that was read for recording."""
+
+    def __init__(self, response: Any, body: bytes):
+        self._response = response
+        self.content = _ReplayStream(body, 0.0)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._response, name)
+
+
+class AsyncRecordingClient:
+    """Wraps an ``AsyncThordataClient``; reads the body so it can be recorded."""
+
+    def __init__(self, client: Any, cassette: Cassette):
+        self._client = client
+        self.cassette = cassette
+
+    async def get(self, url: str, *args: Any, **kwargs: Any) -> Any:
+        key = _match_key("GET", url, _proxy_from_call(args, kwargs))
+        started = time.perf_counter()
+        try:
+            response = await self._client.get(url, *args, **kwargs)
+            headers_at = time.perf_counter()
+            body = await response.read()  # aiohttp caches it for later .read()/.json()
+        except Exception as e:
+            self.cassette.record_error(key, e, time.perf_counter() - started)
+            raise
+        done = time.perf_counter()
+        self.cassette.record_response(
+            key, response.status, response.headers, body, headers_at - started, done - headers_at
+        )
+        return _RecordedAsyncResponse(response, body)
+
+    async def __aenter__(self) -> AsyncRecordingClient:
+        await self._client.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> Any:
+        return await self._client.__aexit__(*exc)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+
+class AsyncReplayClient:
+    """Serves recorded responses through the async ``get`` interface."""
+
+    def __init__(self, cassette: Cassette, latency_scale: float = 1.0):
+        self.cassette = cassette
+        self.latency_scale = latency_scale
+
+    async def get(self, url: str, *args: Any, **kwargs: Any) -> AsyncReplayResponse:
+        record = self.cassette.next(_match_key("GET", url, _proxy_from_call(args, kwargs)))
+        delay = record["elapsed"] * self.latency_scale
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if "error" in record:
+            raise _restore_error(record)
+        return AsyncReplayResponse(record, url, record.get("body_elapsed", 0.0) * self.latency_scale)
+
+    async def __aenter__(self) -> AsyncReplayClient:
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        return None
+
+    async def close(self) -> None:
+        pass
+
+
+_cassettes: dict[str, Cassette] = {}
+
+
+def _env_cassette(mode: str) -> Cassette:
+    path = os.environ["THORDATA_CASSETTE"]
+    cassette = _cassettes.get(path)
+    if cassette is None:
+        cassette = _cassettes[path] = Cassette(path)
+        if mode == "record":
+            cassette.start_recording()
+    return cassette
+
+
+def use_cassette(client: Any) -> Any:
+    """
+    Wrap ``client`` for recording or replay according to the environment.
+
+    Returns ``client`` unchanged unless ``THORDATA_CASSETTE`` is set. Works
+    for ``ThordataClient``, ``AsyncThordataClient`` and ``StickyTunnelPool``.
+    """
+    if not os.getenv("THORDATA_CASSETTE"):
+        return client
+    mode = os.getenv("THORDATA_CASSETTE_MODE", "replay").lower()
+    cassette = _env_cassette(mode)
+    is_async = inspect.iscoroutinefunction(getattr(client, "get", None))
+    if mode == "record":
+        return AsyncRecordingClient(client, cassette) if is_async else RecordingClient(client, cassette)
+    if mode == "replay":
+        scale = float(os.getenv("THORDATA_CASSETTE_LATENCY_SCALE", "1.0"))
+        return AsyncReplayClient(cassette, scale) if is_async else ReplayClient(cassette, scale)
+    raise ValueError(f"THORDATA_CASSETTE_MODE must be 'record' or 'replay', not {mode!r}")
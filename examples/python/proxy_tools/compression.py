@@ -0,0 +1,610 @@
+"""
+Bandwidth-saving compression negotiation with streaming decompression.
+
+Residential and mobile traffic is billed per GB, so every byte on the wire
+counts. ``CompressedClient`` / ``AsyncCompressedClient`` send an
+``Accept-Encoding`` listing the best codecs installed here (zstd, brotli,
+gzip, deflate), read the *raw* body off the proxy connection chunk by chunk
+and decompress each chunk as it arrives, so a large body is never held in
+compressed and decompressed form at once. Every response carries a
+``compression`` record (encoding, wire bytes, decoded bytes, ratio) and the
+client aggregates them in ``stats``.
+
+The SDK clients preload and auto-decode bodies and don't expose the wire
+size, so, like ``StickyTunnelPool``, these clients talk to the proxy directly:
+urllib3 for sync, aiohttp for async. When ``THORDATA_UPSTREAM_PROXY`` is set
+or the endpoint is SOCKS, the sync client delegates to the wrapped
+``ThordataClient`` with the negotiated header; the wire size is then taken
+from ``Content-Length`` when the server sends one. The async client refuses
+upstream proxies rather than silently bypassing them. Without a
+``proxy_config`` both use the same credentials from the environment as the
+SDK clients.
+
+Each decoder call returns at most ``chunk_size`` decoded bytes, however far
+the raw chunk expands, so a compression bomb from a hostile target can't
+blow up memory. brotli needs ``pip install brotli`` (or ``brotlicffi``) 1.2
+or later, which can cap its output; zstd needs ``pip install zstandard``.
+Without them only gzip/deflate are offered.
+
+Usage:
+    client = CompressedClient(ThordataClient(...))
+    response = client.get(url, proxy_config=proxy_config, timeout=30)
+    print(response.compression)        # CompressionInfo(encoding='br', wire=18.2 KB, body=96.0 KB, ratio=5.3x)
+    for chunk in client.stream(url, proxy_config=proxy_config):
+        ...                            # decoded chunks, never the whole body
+    client.stats.report()
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import zlib
+from collections import Counter
+from collections.abc import AsyncIterator, Iterator
+from typing import Any
+
+import requests
+import urllib3
+from requests.structures import CaseInsensitiveDict
+
+from ._transport import ProxyManagers, can_connect_directly, to_response
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _brotli_can_limit() -> bool:
+    # brotli/brotlicffi >= 1.2 can cap the output of one call; older ones can't.
+    return brotli is not None and hasattr(brotli.Decompressor(), "can_accept_more_data")
+
+
+def available_encodings() -> tuple:
+    """Encodings this process can decode with bounded output, best ratio first."""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if _brotli_can_limit():
+        encodings.append("br")
+    return (*encodings, "gzip", "deflate")
+
+
+def accept_encoding(encodings: tuple | None = None) -> str:
+    """``Accept-Encoding`` value for ``encodings`` (default: everything available)."""
+    wanted = available_encodings() if encodings is None else [e for e in encodings if e in available_encodings()]
+    return ", ".join(wanted) or "identity"
+
+
+# Decoders are fed raw bytes with ``feed()`` and drained with ``read(limit)``,
+# which returns at most ``limit`` decoded bytes and b"" once it needs more
+# input, so a small compressed chunk can't expand into one huge buffer.
+
+
+class _ZlibDecoder:
+    def __init__(self, wbits: int) -> None:
+        self._obj = zlib.decompressobj(wbits)
+        self._pending = b""
+
+    def feed(self, data: bytes) -> None:
+        self._pending += data
+
+    def read(self, limit: int) -> bytes:
+        while self._pending:
+            out = self._obj.decompress(self._pending, limit)
+            self._pending = self._obj.unconsumed_tail
+            if out:
+                return out
+        return b""
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+
+class _DeflateDecoder(_ZlibDecoder):
+    # "deflate" is zlib-wrapped per the RFC, but some servers send raw deflate.
+    def __init__(self) -> None:
+        self._obj = None
+        self._pending = b""
+
+    def _start(self, wbits: int) -> None:
+        self._obj = zlib.decompressobj(wbits)
+
+    def read(self, limit: int) -> bytes:
+        if self._obj is None:
+            if len(self._pending) < 2:
+                return b""  # the zlib header can't be checked yet
+            cmf, flg = self._pending[0], self._pending[1]
+            wrapped = cmf & 0x0F == 8 and (cmf << 8 | flg) % 31 == 0
+            self._start(zlib.MAX_WBITS if wrapped else -zlib.MAX_WBITS)
+            if wrapped:
+                data = self._pending
+                try:
+                    return super().read(limit)
+                except zlib.error:
+                    # Raw deflate that happens to look like a zlib header.
+                    self._start(-zlib.MAX_WBITS)
+                    self._pending = data
+        return super().read(limit)
+
+    def flush(self) -> bytes:
+        if self._obj is None:  # body shorter than a zlib header
+            self._start(-zlib.MAX_WBITS)
+            data, self._pending = self._pending, b""
+            return self._obj.decompress(data) + self._obj.flush()
+        return super().flush()
+
+
+class _BrotliDecoder:
+    def __init__(self) -> None:
+        self._obj = brotli.Decompressor()
+        self._process = getattr(self._obj, "process", None) or self._obj.decompress
+        self._pending = b""
+        self._out = b""
+
+    def feed(self, data: bytes) -> None:
+        self._pending += data
+
+    def read(self, limit: int) -> bytes:
+        while not self._out:
+            if self._obj.is_finished():
+                return b""
+            # New input only when the decoder asks for it; until then it is drained with b"".
+            data = b""
+            if self._pending and self._obj.can_accept_more_data():
+                data, self._pending = self._pending, b""
+            self._out = self._process(data, output_buffer_limit=limit)
+            if not self._out and not data:
+                return b""
+        # output_buffer_limit is rounded up to the decoder's buffer size.
+        out, self._out = self._out[:limit], self._out[limit:]
+        return out
+
+    def flush(self) -> bytes:
+        return b""
+
+
+class _ZstdDecoder:
+    # zstandard's decompressobj has no output limit. A zstd block decodes to at
+    # most 128 KB and takes at least 4 input bytes, so feeding the input in
+    # 32-byte slices keeps the output of one call to about 1 MB.
+    SLICE = 32
+
+    def __init__(self) -> None:
+        self._obj = zstandard.ZstdDecompressor().decompressobj()
+        self._pending = b""
+        self._offset = 0
+        self._out = b""
+
+    def feed(self, data: bytes) -> None:
+        self._pending = self._pending[self._offset:] + data
+        self._offset = 0
+
+    def read(self, limit: int) -> bytes:
+        while not self._out and self._offset < len(self._pending):
+            end = self._offset + self.SLICE
+            self._out = self._obj.decompress(self._pending[self._offset:end])
+            self._offset = end
+        out, self._out = self._out[:limit], self._out[limit:]
+        return out
+
+    def flush(self) -> bytes:
+        return b""
+
+
+def _decoder(encoding: str) -> Any:
+    if encoding in ("gzip", "x-gzip"):
+        return _ZlibDecoder(16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return _DeflateDecoder()
+    if encoding == "br" and _brotli_can_limit():
+        return _BrotliDecoder()
+    if encoding == "zstd" and zstandard is not None:
+        return _ZstdDecoder()
+    raise ValueError(f"cannot decode Content-Encoding {encoding!r}")
+
+
+class StreamDecoder:
+    """
+    Incremental decoder for a ``Content-Encoding`` (including stacked ones like ``gzip, br``).
+
+    ``decode()`` and ``flush()`` yield decoded chunks of at most
+    ``max_chunk`` bytes, however far a raw chunk expands.
+    """
+
+    def __init__(self, content_encoding: str | None, max_chunk: int = CHUNK_SIZE):
+        names = [e.strip().lower() for e in (content_encoding or "").split(",")]
+        names = [e for e in names if e and e != "identity"]
+        # Applied in listed order by the server, so undone in reverse.
+        self._decoders = [_decoder(name) for name in reversed(names)]
+        self.max_chunk = max_chunk
+
+    def _drain(self, index: int, data: bytes) -> Iterator[bytes]:
+        if index == len(self._decoders):
+            if data:
+                yield data
+            return
+        decoder = self._decoders[index]
+        decoder.feed(data)
+        while True:
+            out = decoder.read(self.max_chunk)
+            if not out:
+                return
+            yield from self._drain(index + 1, out)
+
+    def decode(self, chunk: bytes) -> Iterator[bytes]:
+        """Decoded chunks for one raw chunk; exhaust it before passing the next one."""
+        return self._drain(0, chunk)
+
+    def flush(self) -> Iterator[bytes]:
+        """Whatever the decoders still hold once the raw body has ended."""
+        for index, decoder in enumerate(self._decoders):
+            yield from self._drain(index, b"")
+            tail = decoder.flush()
+            if tail:
+                yield from self._drain(index + 1, tail)
+
+
+class CompressionInfo:
+    """Wire (body) bytes vs. decoded bytes of one response."""
+
+    __slots__ = ("encoding", "wire_bytes", "body_bytes")
+
+    def __init__(self, encoding: str | None = None, wire_bytes: int = 0, body_bytes: int = 0):
+        self.encoding = encoding or "identity"
+        self.wire_bytes = wire_bytes
+        self.body_bytes = body_bytes
+
+    @property
+    def ratio(self) -> float:
+        return self.body_bytes / self.wire_bytes if self.wire_bytes else 1.0
+
+    @property
+    def saved_bytes(self) -> int:
+        return max(0, self.body_bytes - self.wire_bytes)
+
+    def __repr__(self) -> str:
+        return (f"CompressionInfo(encoding={self.encoding!r}, wire={self.wire_bytes / 1024:.1f} KB, "
+                f"body={self.body_bytes / 1024:.1f} KB, ratio={self.ratio:.1f}x)")
+
+
+class CompressionStats:
+    """Totals across requests; thread-safe."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.wire_bytes = 0
+        self.body_bytes = 0
+        self.by_encoding: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, info: CompressionInfo) -> None:
+        with self._lock:
+            self.requests += 1
+            self.wire_bytes += info.wire_bytes
+            self.body_bytes += info.body_bytes
+            self.by_encoding[info.encoding] += 1
+
+    @property
+    def ratio(self) -> float:
+        return self.body_bytes / self.wire_bytes if self.wire_bytes else 1.0
+
+    def report(self) -> None:
+        saved = 1 - self.wire_bytes / self.body_bytes if self.body_bytes else 0.0
+        print()
+        print(" Compression:")
+        print(f"   Requests:   {self.requests} ({', '.join(f'{e}: {n}' for e, n in self.by_encoding.most_common())})")
+        print(f"   On wire:    {self.wire_bytes / 1024:.1f} KB")
+        print(f"   Decoded:    {self.body_bytes / 1024:.1f} KB")
+        print(f"   Ratio:      {self.ratio:.2f}x ({saved:.0%} fewer billed bytes)")
+
+
+def _with_accept_encoding(headers: dict | None, value: str) -> dict:
+    merged = {k: v for k, v in (headers or {}).items() if k.lower() != "accept-encoding"}
+    merged["Accept-Encoding"] = value
+    return merged
+
+
+class StreamedResponse:
+    """A response whose body is decoded chunk by chunk while it is iterated."""
+
+    def __init__(self, http_resp: Any, url: str, info: CompressionInfo, stats: CompressionStats,
+                 chunk_size: int = CHUNK_SIZE):
+        self.status_code = int(http_resp.status)
+        self.headers = CaseInsensitiveDict(dict(http_resp.headers or {}))
+        self.url = url
+        self.compression = info
+        self._http_resp = http_resp
+        self._stats = stats
+        self._chunk_size = chunk_size
+        self._decoder = StreamDecoder(self.headers.get("Content-Encoding"), chunk_size)
+        self._finished = False
+
+    def iter_content(self) -> Iterator[bytes]:
+        try:
+            for raw in self._http_resp.stream(self._chunk_size, decode_content=False):
+                self.compression.wire_bytes += len(raw)
+                for chunk in self._decoder.decode(raw):
+                    self.compression.body_bytes += len(chunk)
+                    yield chunk
+            for chunk in self._decoder.flush():
+                self.compression.body_bytes += len(chunk)
+                yield chunk
+            self._finished = True
+            self._stats.record(self.compression)
+        finally:
+            self.close()
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self.iter_content()
+
+    def close(self) -> None:
+        if self._finished:
+            self._http_resp.release_conn()
+        else:
+            # Unread body left on the socket: drop the connection instead of reusing it.
+            self._http_resp.close()
+
+    def __enter__(self) -> StreamedResponse:
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def _default_proxy_config(client: Any) -> Any:
+    """The proxy the SDK would use for ``get(url)`` without a ``proxy_config``."""
+    from_env = getattr(client, "_get_default_proxy_config_from_env", None)
+    proxy_config = from_env() if from_env is not None else None
+    if proxy_config is None and client is None:
+        username = os.getenv("THORDATA_RESIDENTIAL_USERNAME")
+        password = os.getenv("THORDATA_RESIDENTIAL_PASSWORD")
+        if username and password:
+            from thordata import ProxyConfig, ProxyProduct
+
+            proxy_config = ProxyConfig(username=username, password=password, product=ProxyProduct.RESIDENTIAL)
+    if proxy_config is None:
+        raise ValueError("pass proxy_config or set THORDATA_RESIDENTIAL_USERNAME and THORDATA_RESIDENTIAL_PASSWORD")
+    return proxy_config
+
+
+class CompressedClient:
+    """Sync client with negotiated compression and per-request ratio stats."""
+
+    def __init__(self, client: Any = None, encodings: tuple | None = None, chunk_size: int = CHUNK_SIZE):
+        self._client = client
+        self.accept_encoding = accept_encoding(encodings)
+        self.chunk_size = chunk_size
+        self.stats = CompressionStats()
+        self._managers = ProxyManagers()
+
+    def stream(self, url: str, proxy_config: Any = None, timeout: float = 30,
+               headers: dict | None = None, method: str = "GET", body: Any = None) -> StreamedResponse:
+        """Send the request; iterate the result for decoded chunks."""
+        proxy_config = proxy_config or _default_proxy_config(self._client)
+        if not can_connect_directly(proxy_config):
+            raise RuntimeError("streaming needs a direct HTTP(S) proxy endpoint (no upstream/SOCKS)")
+        http_resp = self._managers.get(proxy_config).request(
+            method.upper(),
+            url,
+            body=body,
+            headers=_with_accept_encoding(headers, self.accept_encoding),
+            timeout=urllib3.Timeout(connect=timeout, read=timeout),
+            retries=False,
+            preload_content=False,
+            decode_content=False,
+        )
+        info = CompressionInfo(http_resp.headers.get("Content-Encoding"))
+        return StreamedResponse(http_resp, url, info, self.stats, self.chunk_size)
+
+    def request(self, method: str, url: str, proxy_config: Any = None, timeout: float = 30,
+                headers: dict | None = None, body: Any = None) -> requests.Response:
+        proxy_config = proxy_config or _default_proxy_config(self._client)
+        if not can_connect_directly(proxy_config):
+            return self._delegate(method, url, proxy_config, timeout, headers, body)
+        streamed = self.stream(url, proxy_config, timeout, headers, method, body)
+        content = b"".join(streamed.iter_content())
+        # The body is decoded now; keep the original encoding in the compression record only.
+        headers = {k: v for k, v in streamed.headers.items() if k.lower() not in ("content-encoding", "content-length")}
+        response = to_response(streamed.status_code, url, content, headers)
+        response.compression = streamed.compression
+        return response
+
+    def _delegate(self, method: str, url: str, proxy_config: Any, timeout: float,
+                  headers: dict | None, body: Any) -> requests.Response:
+        if self._client is None:
+            raise RuntimeError("upstream/SOCKS proxies need CompressedClient(ThordataClient(...))")
+        # urllib3 inside the SDK decodes the body, so only offer what it can decode.
+        value = urllib3.util.request.ACCEPT_ENCODING
+        verb = getattr(self._client, method.lower())
+        response = verb(url, proxy_config=proxy_config, timeout=timeout,
+                        headers=_with_accept_encoding(headers, value), data=body)
+        length = response.headers.get("Content-Length")
+        body_bytes = len(response.content)
+        info = CompressionInfo(response.headers.get("Content-Encoding"),
+                               int(length) if length and length.isdigit() else body_bytes, body_bytes)
+        self.stats.record(info)
+        response.compression = info
+        return response
+
+    def get(self, url: str, proxy_config: Any = None, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, proxy_config, **kwargs)
+
+    def post(self, url: str, proxy_config: Any = None, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, proxy_config, **kwargs)
+
+    def close(self) -> None:
+        self._managers.close()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+
+class _DecodingStream:
+    """``response.content`` replacement yielding decoded chunks as raw ones arrive."""
+
+    def __init__(self, raw: Any, decoder: StreamDecoder, info: CompressionInfo, stats: CompressionStats):
+        self._raw = raw
+        self._decoder = decoder
+        self._info = info
+        self._stats = stats
+        self._decoded: Iterator[bytes] = iter(())
+        self._done = False
+        self._recorded = False
+
+    async def readany(self) -> bytes:
+        while True:
+            for chunk in self._decoded:
+                self._info.body_bytes += len(chunk)
+                return chunk
+            if self._done:
+                if not self._recorded:
+                    self._recorded = True
+                    self._stats.record(self._info)
+                return b""
+            raw = await self._raw.readany()
+            if raw:
+                self._info.wire_bytes += len(raw)
+                self._decoded = self._decoder.decode(raw)
+            else:
+                self._done = True
+                self._decoded = self._decoder.flush()
+
+    async def read(self, n: int = -1) -> bytes:
+        if n >= 0:
+            return await self.readany()
+        chunks = []
+        while True:
+            chunk = await self.readany()
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+    async def iter_any(self) -> AsyncIterator[bytes]:
+        while True:
+            chunk = await self.readany()
+            if not chunk:
+                return
+            yield chunk
+
+    async def iter_chunked(self, n: int) -> AsyncIterator[bytes]:
+        async for chunk in self.iter_any():
+            yield chunk
+
+
+class AsyncCompressedResponse:
+    """Wraps an ``aiohttp.ClientResponse`` read with ``auto_decompress=False``."""
+
+    def __init__(self, response: Any, info: CompressionInfo, stats: CompressionStats):
+        self._response = response
+        self.compression = info
+        self.content = _DecodingStream(response.content, StreamDecoder(info.encoding), info, stats)
+        self._body: bytes | None = None
+
+    async def read(self) -> bytes:
+        if self._body is None:
+            self._body = await self.content.read()
+            self._response.release()
+        return self._body
+
+    async def text(self, encoding: str = "utf-8") -> str:
+        return (await self.read()).decode(encoding)
+
+    async def json(self, **kwargs: Any) -> Any:
+        return json.loads(await self.read())
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._response, name)
+
+
+class AsyncCompressedClient:
+    """
+    Async counterpart of :class:`CompressedClient`.
+
+    Uses its own ``aiohttp`` session with ``auto_decompress=False``; the
+    wrapped ``AsyncThordataClient`` is only entered/exited alongside it.
+    Upstream proxies aren't supported (as with the SDK async client): with
+    ``THORDATA_UPSTREAM_PROXY`` set, requests raise instead of bypassing it.
+    """
+
+    def __init__(self, client: Any = None, encodings: tuple | None = None, limit: int = 100):
+        self._client = client
+        self.accept_encoding = accept_encoding(encodings)
+        self.stats = CompressionStats()
+        self._limit = limit
+        self._session: Any = None
+
+    async def _ensure_session(self) -> Any:
+        if self._session is None:
+            import aiohttp
+
+            self._session = aiohttp.ClientSession(
+                auto_decompress=False,
+                connector=aiohttp.TCPConnector(limit=self._limit),
+            )
+        return self._session
+
+    async def request(self, method: str, url: str, proxy_config: Any = None, timeout: float | None = None,
+                      headers: dict | None = None, data: Any = None) -> AsyncCompressedResponse:
+        import aiohttp
+
+        if os.getenv("THORDATA_UPSTREAM_PROXY"):
+            raise RuntimeError("AsyncCompressedClient can't chain through THORDATA_UPSTREAM_PROXY")
+        proxy_config = proxy_config or _default_proxy_config(self._client)
+        endpoint = proxy_config.build_proxy_endpoint()
+        if endpoint.startswith("socks"):
+            raise RuntimeError("AsyncCompressedClient needs an HTTP proxy endpoint, not SOCKS")
+        login, _, password = proxy_config.build_proxy_basic_auth().partition(":")
+        options: dict = {}
+        if timeout:
+            options["timeout"] = aiohttp.ClientTimeout(total=timeout)
+
+        session = await self._ensure_session()
+        response = await session.request(
+            method.upper(),
+            url,
+            headers=_with_accept_encoding(headers, self.accept_encoding),
+            data=data,
+            proxy=endpoint,  # plain http:// to the proxy, CONNECT for https targets
+            proxy_auth=aiohttp.BasicAuth(login, password),
+            **options,
+        )
+        info = CompressionInfo(response.headers.get("Content-Encoding"))
+        return AsyncCompressedResponse(response, info, self.stats)
+
+    async def get(self, url: str, proxy_config: Any = None, **kwargs: Any) -> AsyncCompressedResponse:
+        return await self.request("GET", url, proxy_config, **kwargs)
+
+    async def post(self, url: str, proxy_config: Any = None, **kwargs: Any) -> AsyncCompressedResponse:
+        return await self.request("POST", url, proxy_config, **kwargs)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> AsyncCompressedClient:
+        if self._client is not None:
+            await self._client.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> Any:
+        await self.close()
+        if self._client is not None:
+            return await self._client.__aexit__(*exc)
+        return None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
@@ -0,0 +1,70 @@
+"""
+Command line for the offline geo database (see :mod:`proxy_tools.geo_db`).
+
+Usage:
+    python -m proxy_tools.geo_cli build dbip-city-lite.csv geo.tdgeo --format dbip
+    python -m proxy_tools.geo_cli lookup geo.tdgeo 8.8.8.8 2001:4860:4860::8888
+    python -m proxy_tools.geo_cli verify geo.tdgeo exits.csv   # lines of ip,expected_country
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import sys
+from typing import Any
+
+from .geo_db import build_geo_db, open_geo_db, read_csv_ranges
+
+
+def _verify(db: Any, path: str) -> int:
+    matched = mismatched = unknown = 0
+    with open(path, newline="", encoding="utf-8") as fh:
+        for row in csv.reader(fh):
+            if len(row) < 2 or row[0].startswith("#"):
+                continue
+            location = db.lookup(row[0])
+            if location is None or not location.country:
+                unknown += 1
+            elif location.matches(row[1]):
+                matched += 1
+            else:
+                mismatched += 1
+                print(f"   MISMATCH {row[0]}: expected {row[1].upper()}, database says {location.country}")
+    total = matched + mismatched + unknown
+    print(f" Checked {total} exits: {matched} match, {mismatched} mismatch, {unknown} not in database")
+    if total:
+        print(f" Geo accuracy: {matched / max(1, matched + mismatched):.1%} of located exits")
+    return 1 if mismatched else 0
+
+
+def main(argv: list | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m proxy_tools.geo_cli", description="Offline IP geo database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Build a .tdgeo file from a CSV")
+    build.add_argument("csv")
+    build.add_argument("output")
+    build.add_argument("--format", choices=["simple", "dbip", "ip2location"], default="simple")
+    lookup = commands.add_parser("lookup", help="Look up addresses")
+    lookup.add_argument("db")
+    lookup.add_argument("ips", nargs="+")
+    verify = commands.add_parser("verify", help="Check 'ip,expected_country' lines")
+    verify.add_argument("db")
+    verify.add_argument("csv")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        v4, v6 = build_geo_db(read_csv_ranges(args.csv, args.format), args.output)
+        print(f" Wrote {args.output}: {v4} IPv4 + {v6} IPv6 ranges")
+        return 0
+
+    with open_geo_db(args.db) as db:
+        if args.command == "lookup":
+            for ip in args.ips:
+                print(f"   {ip:<40} {db.lookup(ip)}")
+            return 0
+        return _verify(db, args.csv)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
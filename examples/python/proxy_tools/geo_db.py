@@ -0,0 +1,334 @@
+"""
+Offline IP geolocation from a memory-mapped range database.
+
+Checking an exit's location with an extra request to ipinfo.io doubles the
+requests per check and runs into ipinfo's rate limit. ``GeoDatabase`` answers
+the same question locally: the database file is ``mmap``-ed read-only, so
+every process on the host shares the same page-cache copy, and IPv4/IPv6
+lookups are a binary search over fixed-size sorted ranges. Nothing is
+decoded up front; a lookup decodes only the one location it returns.
+
+File layout (little-endian, ``.tdgeo``):
+
+- 40-byte header: magic ``TDGEODB2``, IPv4 range count, IPv6 range count,
+  location count, offsets of the location records and the string pool;
+- IPv4 ranges: ``start u32, end u32, location u32`` (12 bytes each);
+- IPv6 ranges: ``start 16 bytes BE, end 16 bytes BE, location u32`` (36 bytes);
+- locations: ``(offset u32, length u16)`` into the string pool for country,
+  region and city (18 bytes each; length 0 means unknown);
+- string pool: deduplicated UTF-8 strings.
+
+Build one from a DB-IP "lite" (country or city) or IP2Location "LITE" CSV,
+or from a plain ``start,end,country,region,city`` CSV, with
+``python -m proxy_tools.geo_cli``. MaxMind ``.mmdb`` files are opened
+through ``maxminddb`` (also memory-mapped) when it is installed.
+
+Usage:
+    with open_geo_db("geo.tdgeo") as db:
+        location = db.lookup("8.8.8.8")
+"""
+
+from __future__ import annotations
+
+import bisect
+import csv
+import ipaddress
+import mmap
+import os
+import struct
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+try:
+    import maxminddb
+except ImportError:
+    maxminddb = None
+
+MAGIC = b"TDGEODB2"
+_HEADER = struct.Struct("<8sIIIIQQ")
+_V4 = struct.Struct("<III")
+_V6_LOCATION = struct.Struct("<I")
+_V6_SIZE = 36
+_LOCATION = struct.Struct("<IHIHIH")
+_V4_MAX = 0xFFFFFFFF
+_V6_MAX = (1 << 128) - 1
+
+
+class GeoLocation:
+    """Country (ISO code), region and city of an IP range."""
+
+    __slots__ = ("country", "region", "city")
+
+    def __init__(self, country: str | None = None, region: str | None = None, city: str | None = None):
+        self.country = country
+        self.region = region
+        self.city = city
+
+    def matches(self, country: str) -> bool:
+        return bool(self.country) and self.country.lower() == country.lower()
+
+    def __repr__(self) -> str:
+        return f"GeoLocation(country={self.country!r}, region={self.region!r}, city={self.city!r})"
+
+
+def _parse_ip(ip: Any) -> tuple[int, int]:
+    """
+    Return ``(version, value)``, treating IPv4-mapped IPv6 addresses as IPv4.
+
+    Raises ``ValueError`` for anything that is not an address (None included).
+    """
+    if isinstance(ip, (ipaddress.IPv4Address, ipaddress.IPv6Address)):
+        address = ip
+    elif isinstance(ip, int) and not isinstance(ip, bool):
+        if not 0 <= ip <= _V6_MAX:
+            raise ValueError(f"{ip} is out of the IP address range")
+        return (4, ip) if ip <= _V4_MAX else (6, ip)
+    elif isinstance(ip, str):
+        address = ipaddress.ip_address(ip.strip())
+    else:
+        raise ValueError(f"not an IP address: {ip!r}")
+    if address.version == 6 and address.ipv4_mapped is not None:
+        return 4, int(address.ipv4_mapped)
+    return address.version, int(address)
+
+
+class _Starts:
+    """Sequence view of range starts inside the mapped file, for ``bisect``."""
+
+    def __init__(self, buf: Any, offset: int, count: int, version: int):
+        self._buf = buf
+        self._offset = offset
+        self._count = count
+        self._version = version
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> int:
+        if self._version == 4:
+            return _V4.unpack_from(self._buf, self._offset + index * _V4.size)[0]
+        off = self._offset + index * _V6_SIZE
+        return int.from_bytes(self._buf[off:off + 16], "big")
+
+
+class GeoDatabase:
+    """Read-only, memory-mapped ``.tdgeo`` database."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")  # noqa: SIM115 - open as long as the mapping, see close()
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        if len(self._mm) < _HEADER.size or self._mm[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{self.path} is not a .tdgeo database (or was built by an older version)")
+        (_, self.v4_count, self.v6_count, self.location_count, _,
+         self._locations_offset, self._strings_offset) = _HEADER.unpack_from(self._mm, 0)
+        self._v4_offset = _HEADER.size
+        self._v6_offset = self._v4_offset + self.v4_count * _V4.size
+        self._v4_starts = _Starts(self._mm, self._v4_offset, self.v4_count, 4)
+        self._v6_starts = _Starts(self._mm, self._v6_offset, self.v6_count, 6)
+
+    def _string(self, offset: int, length: int) -> str | None:
+        if not length:
+            return None
+        start = self._strings_offset + offset
+        return self._mm[start:start + length].decode("utf-8")
+
+    def location(self, index: int) -> GeoLocation:
+        """Decode location record ``index`` straight from the mapped file."""
+        fields = _LOCATION.unpack_from(self._mm, self._locations_offset + index * _LOCATION.size)
+        return GeoLocation(*(self._string(fields[i], fields[i + 1]) for i in (0, 2, 4)))
+
+    def lookup(self, ip: Any) -> GeoLocation | None:
+        """Location of ``ip``, or None if it is not covered or not an IP (None included)."""
+        try:
+            version, value = _parse_ip(ip)
+        except ValueError:
+            return None
+        if version == 4:
+            index = bisect.bisect_right(self._v4_starts, value) - 1
+            if index < 0:
+                return None
+            _, end, location = _V4.unpack_from(self._mm, self._v4_offset + index * _V4.size)
+        else:
+            index = bisect.bisect_right(self._v6_starts, value) - 1
+            if index < 0:
+                return None
+            off = self._v6_offset + index * _V6_SIZE
+            end = int.from_bytes(self._mm[off + 16:off + 32], "big")
+            (location,) = _V6_LOCATION.unpack_from(self._mm, off + 32)
+        return self.location(location) if value <= end else None
+
+    def country(self, ip: Any) -> str | None:
+        location = self.lookup(ip)
+        return location.country if location else None
+
+    def __len__(self) -> int:
+        return self.v4_count + self.v6_count
+
+    def close(self) -> None:
+        mm = getattr(self, "_mm", None)
+        if mm is not None:
+            mm.close()
+            self._mm = None
+        self._file.close()
+
+    def __enter__(self) -> GeoDatabase:
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class MmdbGeoDatabase:
+    """The ``GeoDatabase`` interface over a MaxMind ``.mmdb`` file (``pip install maxminddb``)."""
+
+    def __init__(self, path: str | Path):
+        if maxminddb is None:
+            raise ImportError("reading .mmdb files needs 'pip install maxminddb'")
+        self.path = Path(path)
+        self._reader = maxminddb.open_database(str(path), maxminddb.MODE_MMAP)
+
+    def lookup(self, ip: Any) -> GeoLocation | None:
+        if ip is None:
+            return None
+        try:
+            record = self._reader.get(str(ip).strip())
+        except (TypeError, ValueError):
+            return None
+        if not record:
+            return None
+        subdivisions = record.get("subdivisions") or [{}]
+        return GeoLocation(
+            (record.get("country") or {}).get("iso_code"),
+            subdivisions[0].get("names", {}).get("en"),
+            (record.get("city") or {}).get("names", {}).get("en"),
+        )
+
+    def country(self, ip: Any) -> str | None:
+        location = self.lookup(ip)
+        return location.country if location else None
+
+    def close(self) -> None:
+        self._reader.close()
+
+    def __enter__(self) -> MmdbGeoDatabase:
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def open_geo_db(path: str | Path) -> GeoDatabase | MmdbGeoDatabase:
+    """Open a ``.tdgeo`` or ``.mmdb`` database, picking the reader by extension."""
+    if str(path).lower().endswith(".mmdb"):
+        return MmdbGeoDatabase(path)
+    return GeoDatabase(path)
+
+
+# -- building ------------------------------------------------------------
+
+
+def build_geo_db(rows: Iterable[tuple], path: str | Path) -> tuple[int, int]:
+    """
+    Write ``(start, end, country, region, city)`` ranges to a ``.tdgeo`` file.
+
+    ``start``/``end`` may be address strings or integers. Ranges are sorted
+    and must not overlap. Returns the IPv4 and IPv6 range counts.
+    """
+    locations: dict[tuple, int] = {}
+    strings: dict[str, tuple[int, int]] = {}
+    pool = bytearray()
+    v4: list[tuple[int, int, int]] = []
+    v6: list[tuple[int, int, int]] = []
+    for start, end, *place in rows:
+        place = tuple((value or None) for value in (list(place) + [None, None, None])[:3])
+        location = locations.setdefault(place, len(locations))
+        start_version, start_value = _parse_ip(start)
+        end_version, end_value = _parse_ip(end)
+        if start_version != end_version or end_value < start_value:
+            raise ValueError(f"bad range {start} - {end}")
+        (v4 if start_version == 4 else v6).append((start_value, end_value, location))
+
+    for ranges in (v4, v6):
+        ranges.sort()
+        for previous, current in zip(ranges, ranges[1:]):
+            if current[0] <= previous[1]:
+                raise ValueError(f"overlapping ranges starting at {previous[0]} and {current[0]}")
+
+    def intern(value: str | None) -> tuple[int, int]:
+        if not value:
+            return 0, 0
+        if value not in strings:
+            data = value.encode("utf-8")
+            if len(data) > 0xFFFF:
+                raise ValueError(f"location name too long: {value[:40]!r}...")
+            strings[value] = (len(pool), len(data))
+            pool.extend(data)
+        return strings[value]
+
+    records = []
+    for place in locations:  # dicts keep insertion order == location index
+        fields = []
+        for value in place:
+            fields.extend(intern(value))
+        records.append(_LOCATION.pack(*fields))
+
+    locations_offset = _HEADER.size + len(v4) * _V4.size + len(v6) * _V6_SIZE
+    strings_offset = locations_offset + len(records) * _LOCATION.size
+
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(_HEADER.pack(MAGIC, len(v4), len(v6), len(records), 0, locations_offset, strings_offset))
+        for start, end, location in v4:
+            fh.write(_V4.pack(start, end, location))
+        for start, end, location in v6:
+            fh.write(start.to_bytes(16, "big") + end.to_bytes(16, "big") + _V6_LOCATION.pack(location))
+        fh.write(b"".join(records))
+        fh.write(pool)
+    os.replace(tmp, path)
+    return len(v4), len(v6)
+
+
+def _ip2location_bound(value: str, v6_file: bool) -> int | ipaddress.IPv6Address:
+    number = int(value)
+    if v6_file:
+        # IP2Location IPv6 files store IPv4 as IPv4-mapped ranges; _parse_ip folds them back.
+        return ipaddress.IPv6Address(number)
+    return number
+
+
+def read_csv_ranges(path: str | Path, fmt: str = "simple") -> Iterator[tuple]:
+    """
+    Yield ``(start, end, country, region, city)`` from a CSV file.
+
+    ``fmt``: ``dbip`` (country lite: start_ip, end_ip, country; city lite:
+    start_ip, end_ip, continent, country, region, city, ...),
+    ``ip2location`` (ip_from, ip_to, country_code, country_name, region, city, ...)
+    or ``simple`` (start, end, country[, region[, city]]).
+    """
+    with open(path, newline="", encoding="utf-8") as fh:
+        reader = csv.reader(fh)
+        for row in reader:
+            if not row or row[0].startswith("#") or row[0].lower() in ("start", "ip_from", "start_ip"):
+                continue
+            if fmt == "dbip":
+                if len(row) == 3:
+                    yield row[0], row[1], row[2], None, None
+                else:
+                    yield row[0], row[1], row[3], row[4] if len(row) > 4 else None, row[5] if len(row) > 5 else None
+            elif fmt == "ip2location":
+                v6_file = int(row[1]) > _V4_MAX
+                country = None if row[2] == "-" else row[2]
+                start, end = _ip2location_bound(row[0], v6_file), _ip2location_bound(row[1], v6_file)
+                yield start, end, country, row[4] if len(row) > 4 else None, row[5] if len(row) > 5 else None
+            elif fmt == "simple":
+                yield tuple(row[:5])
+            else:
+                raise ValueError(f"unknown CSV format {fmt!r}")
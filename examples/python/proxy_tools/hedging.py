@@ -0,0 +1,279 @@
+"""
+Hedged requests to cut tail latency on residential exits.
+
+If a request has not finished after the current pXX latency (p95 by default),
+a second copy is sent through a different session/exit. The first successful
+response wins and the other attempt is cancelled. A hedge budget caps the
+extra traffic to a fraction of primary requests.
+
+Async attempts are truly cancelled. Sync attempts run in threads, which cannot
+be interrupted: the losing attempt is abandoned and its response closed when
+it eventually returns.
+
+Usage:
+    client = HedgedClient(ThordataClient(...), percentile=95, budget_ratio=0.05)
+    response = client.get(url, proxy_config=proxy_config, timeout=10)
+    print(client.stats)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import threading
+import uuid
+from collections import deque
+from collections.abc import Awaitable
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+def fresh_session(proxy_config: Any) -> Any:
+    """
+    Return a copy of ``proxy_config`` that will land on a different exit.
+
+    Configs with a ``session_id`` field get a new random session; rotating
+    configs (no session) already get a new exit per connection and are
+    returned unchanged.
+    """
+    if proxy_config is None or not dataclasses.is_dataclass(proxy_config):
+        return proxy_config
+    if getattr(proxy_config, "session_id", None):
+        return dataclasses.replace(proxy_config, session_id=uuid.uuid4().hex[:12])
+    return proxy_config
+
+
+class LatencyTracker:
+    """Rolling window of successful request latencies."""
+
+    def __init__(self, window: int = 500, initial_delay: float = 2.0, min_samples: int = 20):
+        self._samples: deque = deque(maxlen=window)
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> float:
+        """Latency at ``pct``; falls back to ``initial_delay`` until enough samples exist."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return self.initial_delay
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(pct / 100 * len(ordered)))
+        return ordered[index]
+
+
+class HedgeBudget:
+    """Token budget: each primary request earns ``ratio`` hedges, capped at ``burst``."""
+
+    def __init__(self, ratio: float = 0.05, burst: float = 5.0):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = burst
+        self._lock = threading.Lock()
+
+    def on_request(self) -> None:
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+
+@dataclass
+class HedgeStats:
+    requests: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    budget_denied: int = 0
+
+    @property
+    def extra_traffic(self) -> float:
+        return self.hedges / self.requests if self.requests else 0.0
+
+
+class Hedger:
+    """Shared hedging policy: delay from a latency percentile, capped by a budget."""
+
+    def __init__(self, percentile: float = 95.0, budget_ratio: float = 0.05, budget_burst: float = 5.0,
+                 initial_delay: float = 2.0, hedge_config: Callable[[Any], Any] = fresh_session):
+        self.pct = percentile
+        self.latency = LatencyTracker(initial_delay=initial_delay)
+        self.budget = HedgeBudget(budget_ratio, budget_burst)
+        self.hedge_config = hedge_config
+        self.stats = HedgeStats()
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()  # run_sync callers share stats and the executor
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self.stats, counter, getattr(self.stats, counter) + 1)
+
+    def snapshot(self) -> HedgeStats:
+        """Consistent copy of ``stats`` while other threads keep counting."""
+        with self._lock:
+            return dataclasses.replace(self.stats)
+
+    def delay(self) -> float:
+        return self.latency.percentile(self.pct)
+
+    def _start(self) -> float:
+        self._count("requests")
+        self.budget.on_request()
+        return self.delay()
+
+    def _may_hedge(self) -> bool:
+        if self.budget.try_spend():
+            self._count("hedges")
+            return True
+        self._count("budget_denied")
+        return False
+
+    async def run_async(self, attempt: Callable[[Any], Awaitable[T]], proxy_config: Any = None) -> T:
+        """Run ``attempt(proxy_config)``, hedging with ``attempt(hedge_config(proxy_config))`` if slow."""
+        delay = self._start()
+        started = perf_counter()
+        primary = asyncio.ensure_future(attempt(proxy_config))
+        pending = {primary}
+        hedge = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if not done and self._may_hedge():
+                hedge = asyncio.ensure_future(attempt(self.hedge_config(proxy_config)))
+                pending.add(hedge)
+
+            error: BaseException | None = None
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        self.latency.record(perf_counter() - started)
+                        if task is hedge:
+                            self._count("hedge_wins")
+                        return task.result()
+                    error = error or task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def run_sync(self, attempt: Callable[[Any], T], proxy_config: Any = None) -> T:
+        """Thread-based counterpart of :meth:`run_async`."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="hedge")
+        delay = self._start()
+        started = perf_counter()
+        primary = self._executor.submit(attempt, proxy_config)
+        pending = {primary}
+        hedge = None
+        done, pending = wait(pending, timeout=delay)
+        if not done and self._may_hedge():
+            hedge = self._executor.submit(attempt, self.hedge_config(proxy_config))
+            pending.add(hedge)
+
+        error: BaseException | None = None
+        while True:
+            for future in done:
+                if future.exception() is None:
+                    self.latency.record(perf_counter() - started)
+                    if future is hedge:
+                        self._count("hedge_wins")
+                    for loser in pending:
+                        loser.add_done_callback(_close_result)
+                    return future.result()
+                error = error or future.exception()
+            if not pending:
+                raise error
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+
+def _close_result(future) -> None:
+    if not future.cancelled() and future.exception() is None:
+        close = getattr(future.result(), "close", None)
+        if close:
+            close()
+
+
+class HedgedClient:
+    """Wrap a ``ThordataClient`` so ``get`` is hedged."""
+
+    def __init__(self, client: Any, hedger: Hedger | None = None, **settings: Any):
+        self._client = client
+        self.hedger = hedger or Hedger(**settings)
+
+    @property
+    def stats(self) -> HedgeStats:
+        return self.hedger.snapshot()
+
+    def get(self, url: str, *args: Any, proxy_config: Any = None, **kwargs: Any) -> Any:
+        def attempt(config: Any) -> Any:
+            response = self._client.get(url, *args, proxy_config=config, **kwargs)
+            response.raise_for_status()
+            return response
+
+        return self.hedger.run_sync(attempt, proxy_config)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+
+class AsyncHedgedClient:
+    """
+    Wrap an ``AsyncThordataClient`` so ``get`` is hedged.
+
+    For hedging to cover the body download too, use :meth:`get_json`, which
+    reads the body inside the hedged attempt.
+    """
+
+    def __init__(self, client: Any, hedger: Hedger | None = None, **settings: Any):
+        self._client = client
+        self.hedger = hedger or Hedger(**settings)
+
+    @property
+    def stats(self) -> HedgeStats:
+        return self.hedger.snapshot()
+
+    async def get(self, url: str, *args: Any, proxy_config: Any = None, **kwargs: Any) -> Any:
+        async def attempt(config: Any) -> Any:
+            call_kwargs = dict(kwargs)
+            if config is not None:
+                call_kwargs["proxy_config"] = config
+            response = await self._client.get(url, *args, **call_kwargs)
+            response.raise_for_status()
+            return response
+
+        return await self.hedger.run_async(attempt, proxy_config)
+
+    async def get_json(self, url: str, *args: Any, proxy_config: Any = None, **kwargs: Any) -> Any:
+        async def attempt(config: Any) -> Any:
+            call_kwargs = dict(kwargs)
+            if config is not None:
+                call_kwargs["proxy_config"] = config
+            response = await self._client.get(url, *args, **call_kwargs)
+            response.raise_for_status()
+            return await response.json()
+
+        return await self.hedger.run_async(attempt, proxy_config)
+
+    async def __aenter__(self) -> AsyncHedgedClient:
+        await self._client.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> Any:
+        return await self._client.__aexit__(*exc)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
@@ -0,0 +1,193 @@
+"""
+SQLite-backed, resumable job queue for long crawl runs.
+
+Jobs are (url, proxy targeting) pairs identified by an idempotent key, so
+re-seeding the same workload never duplicates work. Workers claim jobs in
+batches under a lease; a crashed run leaves its jobs "claimed" and they go
+back to the pool once the lease expires, or immediately with
+``requeue_claimed(worker)`` once that worker is known to be dead (see
+``claimed_workers()``). Claims of live workers are never taken away early.
+Completion is also recorded in batches, so the database is touched once per
+batch rather than once per request.
+
+Only targeting options are stored (product, country, state, city, ...);
+credentials stay in the environment and are added when the job runs.
+
+Usage:
+    queue = JobQueue("crawl.db")
+    queue.add_many([("https://ipinfo.io/json", {"country": "us"})])
+    for job in queue.claim_batch(50, worker="w1"):
+        ...
+    queue.complete_many([(job.key, {"ip": "1.2.3.4"})])
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+PENDING = "pending"
+CLAIMED = "claimed"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    key         TEXT PRIMARY KEY,
+    url         TEXT NOT NULL,
+    proxy       TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    worker      TEXT,
+    claimed_at  REAL,
+    result      TEXT,
+    error       TEXT,
+    updated_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, claimed_at);
+"""
+
+
+def job_key(url: str, proxy: dict | None = None) -> str:
+    """Stable key for a (url, proxy targeting) pair."""
+    payload = json.dumps([url, proxy or {}], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+@dataclass(frozen=True)
+class Job:
+    key: str
+    url: str
+    proxy: dict
+    attempts: int
+
+
+class JobQueue:
+    """Persistent job queue; safe to share between threads of one process and between processes."""
+
+    def __init__(self, path: str | Path, lease_seconds: float = 300.0):
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> JobQueue:
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def add_many(self, jobs: Iterable[tuple[str, dict | None]]) -> int:
+        """Enqueue jobs; already-known keys are ignored. Returns the number of new jobs."""
+        now = time.time()
+        rows = [
+            (job_key(url, proxy), url, json.dumps(proxy or {}, sort_keys=True), now)
+            for url, proxy in jobs
+        ]
+        with self._lock:
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO jobs (key, url, proxy, updated_at) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            return self._db.total_changes - before
+
+    def claim_batch(self, size: int, worker: str) -> list[Job]:
+        """Claim up to ``size`` pending jobs (or jobs whose lease expired) for ``worker``."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._db.execute(
+                    "SELECT key, url, proxy, attempts FROM jobs "
+                    "WHERE status = ? OR (status = ? AND claimed_at < ?) "
+                    "LIMIT ?",
+                    (PENDING, CLAIMED, now - self.lease_seconds, size),
+                ).fetchall()
+                self._db.executemany(
+                    "UPDATE jobs SET status = ?, worker = ?, claimed_at = ?, "
+                    "attempts = attempts + 1, updated_at = ? WHERE key = ?",
+                    [(CLAIMED, worker, now, now, row[0]) for row in rows],
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return [Job(key, url, json.loads(proxy), attempts + 1) for key, url, proxy, attempts in rows]
+
+    def complete_many(self, results: Iterable[tuple[str, Any]]) -> None:
+        """Mark jobs done and store their JSON-serialisable results."""
+        now = time.time()
+        rows = [(DONE, json.dumps(result), now, key) for key, result in results]
+        with self._lock:
+            self._db.executemany(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, updated_at = ? WHERE key = ?",
+                rows,
+            )
+
+    def fail_many(self, failures: Iterable[tuple[str, str]], max_attempts: int = 3) -> None:
+        """Record errors; jobs under ``max_attempts`` go back to pending, the rest are failed."""
+        now = time.time()
+        rows = [(max_attempts, PENDING, FAILED, error, now, key) for key, error in failures]
+        with self._lock:
+            self._db.executemany(
+                "UPDATE jobs SET status = CASE WHEN attempts < ? THEN ? ELSE ? END, "
+                "error = ?, claimed_at = NULL, updated_at = ? WHERE key = ?",
+                rows,
+            )
+
+    def requeue_claimed(self, worker: str | None = None) -> int:
+        """
+        Return claimed jobs to pending.
+
+        With ``worker``, all of that worker's claims (call this only when it is
+        known to be dead). Without, only claims whose lease has expired, so
+        jobs held by live workers elsewhere are never fetched twice.
+        """
+        with self._lock:
+            before = self._db.total_changes
+            if worker is None:
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, claimed_at = NULL WHERE status = ? AND claimed_at < ?",
+                    (PENDING, CLAIMED, time.time() - self.lease_seconds),
+                )
+            else:
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, claimed_at = NULL WHERE status = ? AND worker = ?",
+                    (PENDING, CLAIMED, worker),
+                )
+            return self._db.total_changes - before
+
+    def claimed_workers(self) -> list[str]:
+        """Workers currently holding claimed jobs."""
+        with self._lock:
+            rows = self._db.execute("SELECT DISTINCT worker FROM jobs WHERE status = ?", (CLAIMED,)).fetchall()
+        return [row[0] for row in rows]
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {PENDING: 0, CLAIMED: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def results(self) -> Iterable[tuple[str, Any]]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT url, result FROM jobs WHERE status = ? ORDER BY updated_at", (DONE,)
+            ).fetchall()
+        return [(url, json.loads(result)) for url, result in rows]
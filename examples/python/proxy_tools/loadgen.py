@@ -0,0 +1,306 @@
+"""
+Open-loop load generation with coordinated-omission-corrected latency.
+
+A closed-loop test (fire N, wait, fire N more) slows down together with the
+system under test, so queueing delay never shows up in its numbers. Here
+requests are *scheduled* at a fixed or Poisson arrival rate, independent of
+how fast responses come back, and latency is measured from the intended send
+time. A request that had to wait for a free worker or connection is charged
+for that wait, which is the same correction HdrHistogram applies for
+coordinated omission.
+
+Rate profiles are written as stages, e.g. ``"10:30,10-80:60,80:30"``:
+10 req/s for 30 s, then a linear ramp from 10 to 80 req/s over 60 s, then
+80 req/s for 30 s. Per-window results show where latency collapses.
+
+Usage:
+    profile = RateProfile.parse("10-80:60")
+    result = await run_open_loop_async(lambda: send(client), profile)
+    result.report()
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import random
+import threading
+import time
+from collections.abc import Awaitable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+
+class LatencyHistogram:
+    """
+    Log-linear histogram in the spirit of HdrHistogram.
+
+    Values (recorded in microseconds) keep 7 significant bits, i.e. better
+    than 1.6% relative precision, in a small sparse dict of buckets, so
+    millions of samples cost constant memory.
+    """
+
+    _BITS = 7
+
+    def __init__(self) -> None:
+        self.counts: dict[int, int] = {}
+        self.total = 0
+        self.max_us = 0
+
+    def _key(self, value_us: int) -> int:
+        shift = max(0, value_us.bit_length() - self._BITS)
+        return (shift << self._BITS) | (value_us >> shift)
+
+    def _value(self, key: int) -> int:
+        shift, mantissa = key >> self._BITS, key & ((1 << self._BITS) - 1)
+        # Midpoint of the bucket.
+        return (mantissa << shift) + ((1 << shift) >> 1)
+
+    def record(self, seconds: float) -> None:
+        value_us = max(0, int(seconds * 1_000_000))
+        key = self._key(value_us)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.total += 1
+        if value_us > self.max_us:
+            self.max_us = value_us
+
+    def record_corrected(self, seconds: float, expected_interval: float) -> None:
+        """
+        Record ``seconds`` plus the samples a stalled closed-loop tester missed.
+
+        Use this when a sample comes from a closed-loop source with a known
+        intended interval; open-loop runs measure from the intended send time
+        and don't need it.
+        """
+        self.record(seconds)
+        if expected_interval <= 0:
+            return
+        missing = seconds - expected_interval
+        while missing >= expected_interval:
+            self.record(missing)
+            missing -= expected_interval
+
+    def merge(self, other: LatencyHistogram) -> None:
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.total += other.total
+        self.max_us = max(self.max_us, other.max_us)
+
+    def percentile(self, pct: float) -> float:
+        """Latency in seconds at ``pct`` (0-100)."""
+        if not self.total:
+            return 0.0
+        target = max(1, math.ceil(pct / 100 * self.total))
+        seen = 0
+        for key in sorted(self.counts):
+            seen += self.counts[key]
+            if seen >= target:
+                return min(self._value(key), self.max_us) / 1_000_000
+        return self.max_us / 1_000_000
+
+
+@dataclass(frozen=True)
+class Stage:
+    start_rate: float
+    end_rate: float
+    seconds: float
+
+    def rate_at(self, t: float) -> float:
+        if self.seconds <= 0:
+            return self.end_rate
+        return self.start_rate + (self.end_rate - self.start_rate) * min(1.0, t / self.seconds)
+
+
+class RateProfile:
+    """Sequence of constant or linearly ramping stages."""
+
+    def __init__(self, stages: list[Stage]):
+        if not stages:
+            raise ValueError("rate profile needs at least one stage")
+        self.stages = stages
+
+    @classmethod
+    def parse(cls, spec: str) -> RateProfile:
+        """Parse ``"rate:seconds"`` / ``"from-to:seconds"`` stages separated by commas."""
+        stages = []
+        for part in spec.split(","):
+            rates, _, seconds = part.strip().partition(":")
+            if not seconds:
+                raise ValueError(f"stage {part!r} must look like 'rate:seconds' or 'from-to:seconds'")
+            start, _, end = rates.partition("-")
+            stages.append(Stage(float(start), float(end or start), float(seconds)))
+        return cls(stages)
+
+    @classmethod
+    def constant(cls, rate: float, seconds: float) -> RateProfile:
+        return cls([Stage(rate, rate, seconds)])
+
+    @property
+    def duration(self) -> float:
+        return sum(stage.seconds for stage in self.stages)
+
+    def schedule(self, poisson: bool = False, seed: int | None = None) -> Iterator[float]:
+        """Yield intended send times (seconds from start)."""
+        rng = random.Random(seed)
+        offset = 0.0
+        for stage in self.stages:
+            # Arrivals at the start of each interval, so a constant stage gets
+            # exactly rate * seconds of them regardless of float rounding.
+            t = 0.0
+            while t < stage.seconds - 1e-9:
+                rate = stage.rate_at(t)
+                if rate <= 0:
+                    t += 0.1
+                    continue
+                yield offset + t
+                t += rng.expovariate(rate) if poisson else 1.0 / rate
+            offset += stage.seconds
+
+
+@dataclass
+class Window:
+    # sent/ok/errors/latency: requests *scheduled* in this window;
+    # completed: requests that *finished* in it (the achieved throughput).
+    sent: int = 0
+    completed: int = 0
+    ok: int = 0
+    errors: int = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+
+class LoadResult:
+    """Corrected (from intended send) and service (from actual send) latency, per window."""
+
+    def __init__(self, window_seconds: float = 5.0):
+        self.window_seconds = window_seconds
+        self.corrected = LatencyHistogram()
+        self.service = LatencyHistogram()
+        self.windows: dict[int, Window] = {}
+        self.ok = 0
+        self.errors = 0
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, intended: float, started: float, finished: float, ok: bool) -> None:
+        with self._lock:
+            window = self.windows.setdefault(int(intended // self.window_seconds), Window())
+            done = self.windows.setdefault(int(finished // self.window_seconds), Window())
+            done.completed += 1
+            window.sent += 1
+            if ok:
+                self.ok += 1
+                window.ok += 1
+            else:
+                self.errors += 1
+                window.errors += 1
+            self.corrected.record(finished - intended)
+            self.service.record(finished - started)
+            window.latency.record(finished - intended)
+
+    def report(self, profile: RateProfile | None = None) -> None:
+        ms = 1000
+        total = self.ok + self.errors
+        print()
+        print(" Open-loop results:")
+        print(f"   Requests:     {total} ({self.ok} ok, {self.errors} errors)")
+        if self.elapsed:
+            print(f"   Achieved:     {total / self.elapsed:.1f} req/s over {self.elapsed:.1f}s")
+        print()
+        print("   Latency (ms)        p50      p90      p99    p99.9      max")
+        for label, hist in (("from intended send", self.corrected), ("service time only", self.service)):
+            values = [hist.percentile(p) * ms for p in (50, 90, 99, 99.9)] + [hist.max_us / 1000]
+            print(f"   {label:<18}" + "".join(f"{v:>9.0f}" for v in values))
+        print()
+        print(f"   Per {self.window_seconds:.0f}s window:")
+        print("     start   target   achieved   errors   p50 ms   p99 ms")
+        for index in sorted(self.windows):
+            window = self.windows[index]
+            start = index * self.window_seconds
+            target = f"{_target_rate(profile, start + self.window_seconds / 2):>8.1f}" if profile else "       -"
+            print(f"     {start:>4.0f}s {target} {window.completed / self.window_seconds:>10.1f} "
+                  f"{window.errors:>8d} {window.latency.percentile(50) * ms:>8.0f} "
+                  f"{window.latency.percentile(99) * ms:>8.0f}")
+
+
+def _target_rate(profile: RateProfile, t: float) -> float:
+    for stage in profile.stages:
+        if t < stage.seconds:
+            return stage.rate_at(t)
+        t -= stage.seconds
+    return 0.0
+
+
+async def run_open_loop_async(send: Callable[[], Awaitable[Any]], profile: RateProfile,
+                              poisson: bool = False, max_in_flight: int = 1000,
+                              window_seconds: float = 5.0, seed: int | None = None) -> LoadResult:
+    """
+    Call ``send()`` on the schedule, never waiting for earlier requests to finish.
+
+    ``max_in_flight`` bounds memory: the scheduler waits for a free slot
+    before creating the next task, so at most that many tasks exist. Requests
+    delayed by the wait keep their intended send time, so the wait is included
+    in their corrected latency.
+    """
+    result = LoadResult(window_seconds)
+    slots = asyncio.Semaphore(max_in_flight)
+    loop = asyncio.get_running_loop()
+    origin = loop.time()
+    tasks = set()
+
+    async def one(intended: float) -> None:
+        try:
+            started = loop.time() - origin
+            try:
+                await send()
+                ok = True
+            except Exception:
+                ok = False
+            result.record(intended, started, loop.time() - origin, ok)
+        finally:
+            slots.release()
+
+    for intended in profile.schedule(poisson, seed):
+        delay = intended - (loop.time() - origin)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await slots.acquire()
+        task = loop.create_task(one(intended))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    if tasks:
+        await asyncio.gather(*tasks)
+    result.elapsed = loop.time() - origin
+    return result
+
+
+def run_open_loop_sync(send: Callable[[], Any], profile: RateProfile, poisson: bool = False,
+                       workers: int = 64, window_seconds: float = 5.0,
+                       seed: int | None = None) -> LoadResult:
+    """
+    Thread-pool version for the sync client.
+
+    The scheduler submits on time regardless of free workers; time spent in
+    the executor queue counts toward corrected latency.
+    """
+    result = LoadResult(window_seconds)
+    origin = time.perf_counter()
+
+    def one(intended: float) -> None:
+        started = time.perf_counter() - origin
+        try:
+            send()
+            ok = True
+        except Exception:
+            ok = False
+        result.record(intended, started, time.perf_counter() - origin, ok)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="loadgen") as pool:
+        for intended in profile.schedule(poisson, seed):
+            delay = intended - (time.perf_counter() - origin)
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(one, intended)
+    result.elapsed = time.perf_counter() - origin
+    return result
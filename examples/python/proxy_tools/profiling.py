@@ -0,0 +1,240 @@
+"""
+Built-in profiling mode for the concurrent examples.
+
+Answers "is the proxy slow, or is our event loop blocked?":
+
+- a loop-lag sampler measures how late a periodic timer fires;
+- a watchdog thread notices when the loop stops ticking for longer than
+  ``slow_ms`` and captures the loop thread's stack at that moment (the code
+  that is blocking it: JSON parsing, logging, a sync call, ...);
+- optional cProfile / tracemalloc snapshots every N completed requests;
+- a summary report at exit that puts request latency next to loop lag.
+
+Usage:
+    add_profile_args(parser)
+    args = parser.parse_args()
+    async with Profiler.from_args(args) as profiler:
+        results = await asyncio.gather(*(profiler.track(fetch(i)) for i in range(n)))
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+from collections import Counter
+from collections.abc import Awaitable
+from pathlib import Path
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+def add_profile_args(parser) -> None:
+    """Register the shared ``--profile`` options on an argparse parser."""
+    group = parser.add_argument_group("profiling")
+    group.add_argument("--profile", action="store_true", help="Enable loop-lag/slow-callback profiling")
+    group.add_argument("--profile-slow-ms", type=float, default=100.0,
+                       help="Report loop stalls longer than this (ms)")
+    group.add_argument("--profile-every", type=int, default=0,
+                       help="Take cProfile/tracemalloc snapshots every N requests (implies --profile; "
+                            "both kinds unless one is chosen)")
+    group.add_argument("--profile-cprofile", action="store_true", help="Run cProfile on the event loop thread")
+    group.add_argument("--profile-tracemalloc", action="store_true", help="Track allocations with tracemalloc")
+    group.add_argument("--profile-dir", default="profile", help="Where snapshot files are written")
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Profiler:
+    """Collects loop lag, stalls with stacks, per-request latency and optional snapshots."""
+
+    def __init__(self, enabled: bool = True, slow_ms: float = 100.0, sample_interval: float = 0.01,
+                 every: int = 0, use_cprofile: bool = False, use_tracemalloc: bool = False,
+                 output_dir: str = "profile"):
+        self.enabled = enabled
+        self.slow = slow_ms / 1000
+        self.sample_interval = sample_interval
+        self.every = every
+        self.use_cprofile = use_cprofile
+        self.use_tracemalloc = use_tracemalloc
+        self.output_dir = Path(output_dir)
+
+        self.lags: list[float] = []
+        self.latencies: list[float] = []
+        self.errors = 0
+        self.stalls: list[tuple[float, str]] = []
+        self._stall_stacks: Counter = Counter()
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: int | None = None
+        self._sampler: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._cprofile: cProfile.Profile | None = None
+        self._memory_baseline = None
+        self._started = 0.0
+
+    @classmethod
+    def from_args(cls, args: Any) -> Profiler:
+        use_cprofile, use_tracemalloc = args.profile_cprofile, args.profile_tracemalloc
+        if args.profile_every and not (use_cprofile or use_tracemalloc):
+            # Snapshots were asked for without saying which: take both.
+            use_cprofile = use_tracemalloc = True
+        return cls(
+            enabled=bool(args.profile or args.profile_every or use_cprofile or use_tracemalloc),
+            slow_ms=args.profile_slow_ms,
+            every=args.profile_every,
+            use_cprofile=use_cprofile,
+            use_tracemalloc=use_tracemalloc,
+            output_dir=args.profile_dir,
+        )
+
+    async def __aenter__(self) -> Profiler:
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Stop sampling and print the summary report (no-op when disabled)."""
+        if self.enabled:
+            await self.stop()
+            self.report()
+
+    def start(self) -> None:
+        if not self.enabled:
+            return
+        self._started = time.perf_counter()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._sampler = asyncio.get_running_loop().create_task(self._sample_lag())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        if self.use_tracemalloc:
+            tracemalloc.start(10)
+            self._memory_baseline = tracemalloc.take_snapshot()
+        if self.use_cprofile:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    async def stop(self) -> None:
+        if self._cprofile:
+            self._cprofile.disable()
+        self._stop.set()
+        if self._sampler:
+            self._sampler.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._sampler
+
+    async def track(self, awaitable: Awaitable[T]) -> T:
+        """Await a request, recording its latency and triggering periodic snapshots."""
+        if not self.enabled:
+            return await awaitable
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+            count = len(self.latencies)
+            if self.every and count % self.every == 0:
+                self.snapshot(count)
+
+    async def _sample_lag(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.sample_interval
+            await asyncio.sleep(self.sample_interval)
+            self.lags.append(max(0.0, time.perf_counter() - expected))
+            self._heartbeat = time.monotonic()
+
+    def _watch(self) -> None:
+        """Runs in a thread: if the loop stops ticking, grab the loop thread's stack."""
+        reported_for = None
+        while not self._stop.wait(self.slow / 2):
+            beat = self._heartbeat
+            stalled = time.monotonic() - beat
+            if stalled < self.slow or reported_for == beat:
+                continue
+            reported_for = beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame, limit=12))
+            self.stalls.append((stalled, stack))
+            self._stall_stacks[stack] += 1
+
+    def snapshot(self, count: int) -> None:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if self._cprofile:
+            path = self.output_dir / f"cprofile-{count:06d}.prof"
+            self._cprofile.dump_stats(str(path))
+            self._cprofile.enable()  # dump_stats() disables the profiler
+            print(f"   [PROFILE] cProfile snapshot after {count} requests: {path}")
+        if self.use_tracemalloc and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            path = self.output_dir / f"tracemalloc-{count:06d}.snap"
+            tracemalloc.take_snapshot().dump(str(path))
+            print(f"   [PROFILE] Memory after {count} requests: {current / 1e6:.1f} MB "
+                  f"(peak {peak / 1e6:.1f} MB): {path}")
+
+    def report(self) -> None:
+        elapsed = time.perf_counter() - self._started
+        ms = 1000
+        print()
+        print(" Profile summary:")
+        print(f"   Wall time:          {elapsed:.2f}s")
+        print(f"   Requests:           {len(self.latencies)} ({self.errors} raised)")
+        if self.latencies:
+            print(f"   Request latency:    p50 {percentile(self.latencies, 50) * ms:.0f} ms, "
+                  f"p95 {percentile(self.latencies, 95) * ms:.0f} ms, "
+                  f"max {max(self.latencies) * ms:.0f} ms")
+        if self.lags:
+            print(f"   Event-loop lag:     p50 {percentile(self.lags, 50) * ms:.1f} ms, "
+                  f"p99 {percentile(self.lags, 99) * ms:.1f} ms, "
+                  f"max {max(self.lags) * ms:.1f} ms")
+        print(f"   Loop stalls > {self.slow * ms:.0f} ms: {len(self.stalls)}")
+
+        if self.lags and self.latencies:
+            blocked = sum(self.lags)
+            share = blocked / elapsed if elapsed else 0.0
+            verdict = "client-side (loop blocked)" if share > 0.2 else "proxy/network"
+            print(f"   Loop blocked:       {share:.0%} of wall time -> bottleneck looks {verdict}")
+
+        for stack, hits in self._stall_stacks.most_common(3):
+            print()
+            print(f"   Stall stack (seen {hits}x):")
+            for line in stack.rstrip().splitlines()[-6:]:
+                print(f"     {line}")
+
+        if self._cprofile:
+            out = io.StringIO()
+            pstats.Stats(self._cprofile, stream=out).sort_stats("cumulative").print_stats(10)
+            print()
+            print("   cProfile (top 10 by cumulative time):")
+            for line in out.getvalue().splitlines():
+                if line.strip():
+                    print(f"     {line}")
+
+        if self.use_tracemalloc and tracemalloc.is_tracing():
+            print()
+            print("   Top allocations since start:")
+            diff = tracemalloc.take_snapshot().compare_to(self._memory_baseline, "lineno")
+            for stat in diff[:5]:
+                print(f"     {stat}")
+            tracemalloc.stop()
@@ -0,0 +1,381 @@
+"""
+Cross-process rate limiting for Thordata proxy quotas.
+
+Every worker on the same host shares one token bucket (request rate) and one
+pool of concurrency slots per (ProxyProduct, credential) pair. State lives in
+small lock-protected files under a shared directory, so unrelated processes
+(cron jobs, several ``04_concurrent_requests.py`` runs) coordinate without a
+broker. Concurrency slots are OS file locks, which the kernel releases if a
+worker crashes.
+
+A request waits for a rate token first and only then takes a concurrency
+slot, so slots are never held idle while the bucket refills. With the async
+client a slot is held until the response body has been read (or the
+response released), not just until the headers arrive.
+
+Usage:
+    limiter = QuotaLimiter.for_proxy(proxy_config, rate=20, max_concurrent=10)
+    client = RateLimitedClient(ThordataClient(...), limiter)
+    client.get(url, proxy_config=proxy_config)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import os
+import struct
+import tempfile
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any, Callable
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULT_STATE_DIR = Path(
+    os.getenv("THORDATA_RATE_LIMIT_DIR", Path(tempfile.gettempdir()) / "thordata-ratelimit")
+)
+
+# Bucket state: available tokens, last refill timestamp (wall clock, shared by all processes).
+_STATE = struct.Struct("<dd")
+
+
+def _lock(fh, blocking: bool = True) -> bool:
+    """Take an exclusive lock on an open file. Returns False if busy and non-blocking."""
+    try:
+        if fcntl is not None:
+            flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+            fcntl.flock(fh.fileno(), flags)
+        else:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        if blocking:
+            raise
+        return False
+
+
+def _unlock(fh) -> None:
+    if fcntl is not None:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+    else:
+        fh.seek(0)
+        msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def quota_key(proxy_config: Any = None) -> str:
+    """
+    Build the limiter key for a proxy configuration.
+
+    The key combines the product (residential, mobile, ...) with a hash of the
+    proxy username, so the credential never appears in file names. Without a
+    config, the residential credentials from the environment are used, which
+    matches what ``AsyncThordataClient`` does for ``client.get(url)``.
+    """
+    if proxy_config is not None:
+        product = getattr(proxy_config, "product", None)
+        product = getattr(product, "value", product) or "residential"
+        username = getattr(proxy_config, "username", "") or ""
+    else:
+        product = "residential"
+        username = os.getenv("THORDATA_RESIDENTIAL_USERNAME", "")
+    digest = hashlib.sha256(username.encode()).hexdigest()[:12]
+    return f"{product}-{digest}"
+
+
+class SharedTokenBucket:
+    """Token bucket whose state is shared by every process using the same key."""
+
+    def __init__(self, key: str, rate: float, burst: float | None = None, state_dir: Path | None = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        state_dir = Path(state_dir or DEFAULT_STATE_DIR)
+        state_dir.mkdir(parents=True, exist_ok=True)
+        self.path = state_dir / f"{key}.bucket"
+
+    def _take(self, tokens: float) -> float:
+        """Try to take tokens. Returns 0 on success, otherwise seconds until enough refill."""
+        with open(self.path, "a+b") as fh:
+            _lock(fh)
+            try:
+                fh.seek(0)
+                raw = fh.read(_STATE.size)
+                now = time.time()
+                if len(raw) == _STATE.size:
+                    available, last = _STATE.unpack(raw)
+                    available = min(self.burst, available + max(0.0, now - last) * self.rate)
+                else:
+                    available = self.burst
+
+                wait = 0.0
+                if available >= tokens:
+                    available -= tokens
+                else:
+                    wait = (tokens - available) / self.rate
+
+                fh.seek(0)
+                fh.truncate()
+                fh.write(_STATE.pack(available, now))
+                fh.flush()
+                return wait
+            finally:
+                _unlock(fh)
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until tokens are available. Returns the time spent waiting."""
+        waited = 0.0
+        while True:
+            wait = self._take(tokens)
+            if wait == 0.0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    async def acquire_async(self, tokens: float = 1.0) -> float:
+        """Async variant of :meth:`acquire`; never blocks the event loop for long."""
+        waited = 0.0
+        while True:
+            wait = self._take(tokens)
+            if wait == 0.0:
+                return waited
+            await asyncio.sleep(wait)
+            waited += wait
+
+
+class SharedConcurrencyLimit:
+    """Cross-process semaphore made of ``max_concurrent`` lockable slot files."""
+
+    def __init__(self, key: str, max_concurrent: int, state_dir: Path | None = None, poll_interval: float = 0.05):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be >= 1")
+        self.max_concurrent = max_concurrent
+        self.poll_interval = poll_interval
+        self.slot_dir = Path(state_dir or DEFAULT_STATE_DIR) / f"{key}.slots"
+        self.slot_dir.mkdir(parents=True, exist_ok=True)
+        # Spread start positions so workers don't all contend on slot 0.
+        self._offset = os.getpid()
+
+    def _try_claim(self):
+        for i in range(self.max_concurrent):
+            index = (self._offset + i) % self.max_concurrent
+            fh = open(self.slot_dir / f"{index}.lock", "a+b")  # noqa: SIM115 - held until the slot is released
+            if _lock(fh, blocking=False):
+                return fh
+            fh.close()
+        return None
+
+    @staticmethod
+    def _release(fh) -> None:
+        try:
+            _unlock(fh)
+        finally:
+            fh.close()
+
+    @contextlib.contextmanager
+    def slot(self) -> Iterator[None]:
+        fh = self._try_claim()
+        while fh is None:
+            time.sleep(self.poll_interval)
+            fh = self._try_claim()
+        try:
+            yield
+        finally:
+            self._release(fh)
+
+    async def claim_async(self) -> Callable[[], None]:
+        """Wait for a free slot; returns the function that releases it."""
+        fh = self._try_claim()
+        while fh is None:
+            await asyncio.sleep(self.poll_interval)
+            fh = self._try_claim()
+        return lambda: self._release(fh)
+
+    @contextlib.asynccontextmanager
+    async def slot_async(self):
+        release = await self.claim_async()
+        try:
+            yield
+        finally:
+            release()
+
+
+class QuotaLimiter:
+    """Request-rate bucket plus concurrency slots for one product/credential."""
+
+    def __init__(self, key: str, rate: float | None = None, max_concurrent: int | None = None,
+                 burst: float | None = None, state_dir: Path | None = None):
+        self.key = key
+        self.bucket = SharedTokenBucket(key, rate, burst, state_dir) if rate else None
+        self.concurrency = SharedConcurrencyLimit(key, max_concurrent, state_dir) if max_concurrent else None
+
+    @classmethod
+    def for_proxy(cls, proxy_config: Any = None, **kwargs: Any) -> QuotaLimiter:
+        return cls(quota_key(proxy_config), **kwargs)
+
+    @contextlib.contextmanager
+    def limit(self) -> Iterator[None]:
+        # Token first: waiting for the bucket while holding a slot would starve other workers.
+        if self.bucket:
+            self.bucket.acquire()
+        with self.concurrency.slot() if self.concurrency else contextlib.nullcontext():
+            yield
+
+    async def acquire_async(self) -> Callable[[], None]:
+        """Wait for a token, then a slot; returns the function that releases the slot."""
+        if self.bucket:
+            await self.bucket.acquire_async()
+        if self.concurrency:
+            return await self.concurrency.claim_async()
+        return lambda: None
+
+    @contextlib.asynccontextmanager
+    async def limit_async(self):
+        release = await self.acquire_async()
+        try:
+            yield
+        finally:
+            release()
+
+
+class _LimiterRegistry:
+    """Lazily creates one QuotaLimiter per quota key with shared settings."""
+
+    def __init__(self, limiter: QuotaLimiter | None, **settings: Any):
+        self._fixed = limiter
+        self._settings = settings
+        self._limiters: dict = {}
+
+    def get(self, proxy_config: Any) -> QuotaLimiter:
+        if self._fixed is not None:
+            return self._fixed
+        key = quota_key(proxy_config)
+        if key not in self._limiters:
+            self._limiters[key] = QuotaLimiter(key, **self._settings)
+        return self._limiters[key]
+
+
+class RateLimitedClient:
+    """
+    Wrap a ``ThordataClient`` so every ``get`` passes through the shared quota.
+
+    Pass either a single ``limiter`` or limiter settings (``rate``,
+    ``max_concurrent``, ...); with settings, a limiter is picked per
+    ``proxy_config`` so different products and credentials are limited
+    independently.
+    """
+
+    def __init__(self, client: Any, limiter: QuotaLimiter | None = None, **settings: Any):
+        self._client = client
+        self._registry = _LimiterRegistry(limiter, **settings)
+
+    def get(self, url: str, *args: Any, proxy_config: Any = None, **kwargs: Any) -> Any:
+        with self._registry.get(proxy_config).limit():
+            return self._client.get(url, *args, proxy_config=proxy_config, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+
+class _SlotHoldingResponse:
+    """
+    aiohttp response that keeps its concurrency slot until the body is done.
+
+    The slot is released once ``read()``/``text()``/``json()`` returns, on
+    ``release()``/``close()``, when used as ``async with response:``, or at
+    garbage collection, whichever comes first.
+    """
+
+    def __init__(self, response: Any, release: Callable[[], None]):
+        self._response = response
+        self._release_slot = release
+
+    def _done(self) -> None:
+        release, self._release_slot = self._release_slot, None
+        if release is not None:
+            release()
+
+    async def read(self) -> bytes:
+        try:
+            return await self._response.read()
+        finally:
+            self._done()
+
+    async def text(self, *args: Any, **kwargs: Any) -> str:
+        try:
+            return await self._response.text(*args, **kwargs)
+        finally:
+            self._done()
+
+    async def json(self, *args: Any, **kwargs: Any) -> Any:
+        try:
+            return await self._response.json(*args, **kwargs)
+        finally:
+            self._done()
+
+    def release(self) -> Any:
+        try:
+            return self._response.release()
+        finally:
+            self._done()
+
+    def close(self) -> None:
+        try:
+            self._response.close()
+        finally:
+            self._done()
+
+    async def __aenter__(self) -> _SlotHoldingResponse:
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        self.release()
+
+    def __del__(self) -> None:
+        self._done()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._response, name)
+
+
+class AsyncRateLimitedClient:
+    """
+    Async counterpart of :class:`RateLimitedClient` for ``AsyncThordataClient``.
+
+    ``get`` returns the response wrapped so its concurrency slot stays taken
+    until the body has been read or the response released.
+    """
+
+    def __init__(self, client: Any, limiter: QuotaLimiter | None = None, **settings: Any):
+        self._client = client
+        self._registry = _LimiterRegistry(limiter, **settings)
+
+    async def get(self, url: str, *args: Any, proxy_config: Any = None, **kwargs: Any) -> Any:
+        if proxy_config is not None:
+            kwargs["proxy_config"] = proxy_config
+        release = await self._registry.get(proxy_config).acquire_async()
+        try:
+            response = await self._client.get(url, *args, **kwargs)
+        except BaseException:
+            release()
+            raise
+        return _SlotHoldingResponse(response, release)
+
+    async def __aenter__(self) -> AsyncRateLimitedClient:
+        await self._client.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> Any:
+        return await self._client.__aexit__(*exc)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
@@ -0,0 +1,178 @@
+"""
+Fast, typed response decoding with compact result records.
+
+``decode_ip_info()`` picks the fastest decoder that is installed:
+
+- msgspec: decodes straight into a typed struct, skipping unknown fields
+  (no intermediate dict at all);
+- orjson: fast parse into a dict, then the few fields we need are copied;
+- stdlib ``json`` otherwise.
+
+Results are stored as ``__slots__`` records instead of one dict per result,
+and ``ResultBatch`` keeps large runs in columns (an ``array`` of ids, a list
+of IPs, a byte array of status flags) for cheap bulk aggregation.
+
+Install the fast paths with ``pip install orjson`` or ``pip install msgspec``.
+"""
+
+from __future__ import annotations
+
+import json
+from array import array
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from typing import Any, Optional
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+IP_FIELDS = ("ip", "city", "region", "country", "org")
+
+if msgspec is not None:
+
+    # msgspec evaluates these annotations at runtime, where py39 has no ``X | None``.
+    class _IpInfoStruct(msgspec.Struct):
+        ip: Optional[str] = None  # noqa: UP045
+        origin: Optional[str] = None  # noqa: UP045  # httpbin-style responses
+        city: Optional[str] = None  # noqa: UP045
+        region: Optional[str] = None  # noqa: UP045
+        country: Optional[str] = None  # noqa: UP045
+        org: Optional[str] = None  # noqa: UP045
+
+    _ip_decoder = msgspec.json.Decoder(_IpInfoStruct)
+    JSON_BACKEND = "msgspec"
+elif orjson is not None:
+    JSON_BACKEND = "orjson"
+else:
+    JSON_BACKEND = "json"
+
+
+def loads(body: bytes | str) -> Any:
+    """Decode a JSON body with the fastest available generic decoder."""
+    if orjson is not None:
+        return orjson.loads(body)
+    if msgspec is not None:
+        return msgspec.json.decode(body)
+    return json.loads(body)
+
+
+class IpInfo:
+    """The fields we use from ipinfo.io / httpbin.org responses."""
+
+    __slots__ = IP_FIELDS
+
+    def __init__(self, ip: str | None = None, city: str | None = None, region: str | None = None,
+                 country: str | None = None, org: str | None = None):
+        self.ip = ip
+        self.city = city
+        self.region = region
+        self.country = country
+        self.org = org
+
+    def __repr__(self) -> str:
+        return f"IpInfo(ip={self.ip!r}, country={self.country!r}, city={self.city!r})"
+
+
+def decode_ip_info(body: bytes | str) -> IpInfo:
+    """Decode an IP-info response body straight into an :class:`IpInfo`."""
+    if msgspec is not None:
+        data = _ip_decoder.decode(body)
+        return IpInfo(data.ip or data.origin, data.city, data.region, data.country, data.org)
+    data = loads(body)
+    get = data.get
+    return IpInfo(get("ip") or get("origin"), get("city"), get("region"), get("country"), get("org"))
+
+
+class IpResult:
+    """Outcome of one IP-check request; ``error`` is None on success."""
+
+    __slots__ = ("id", "ip", "error")
+
+    def __init__(self, id: int, ip: str | None = None, error: str | None = None):
+        self.id = id
+        self.ip = ip
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def status(self) -> str:
+        return "success" if self.error is None else f"error: {self.error}"
+
+
+class LocationResult:
+    """Outcome of one geo-targeted request."""
+
+    __slots__ = ("target", "info", "error")
+
+    def __init__(self, target: str, info: IpInfo | None = None, error: str | None = None):
+        self.target = target
+        self.info = info
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class ResultBatch:
+    """
+    Columnar store for many :class:`IpResult`-style outcomes.
+
+    Ids live in a typed ``array``, success flags in a ``bytearray`` and IPs in
+    a list that reuses one string object per distinct IP; errors are kept
+    sparsely. That is a fraction of the memory of a list of dicts and makes
+    aggregates (success count, unique IPs) single passes over flat columns.
+    """
+
+    def __init__(self) -> None:
+        self.ids = array("q")
+        self.ok = bytearray()
+        self.ips: list = []
+        self.errors: dict[int, str] = {}
+        self._interned: dict[str, str] = {}
+
+    def append(self, id: int, ip: str | None = None, error: str | None = None) -> None:
+        if ip is not None:
+            ip = self._interned.setdefault(ip, ip)
+        if error is not None:
+            self.errors[len(self.ids)] = error
+        self.ids.append(id)
+        self.ok.append(error is None)
+        self.ips.append(ip)
+
+    def add(self, result: IpResult) -> None:
+        self.append(result.id, result.ip, result.error)
+
+    @classmethod
+    def from_results(cls, results: Iterable[IpResult]) -> ResultBatch:
+        batch = cls()
+        for result in results:
+            batch.add(result)
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[IpResult]:
+        for index, id in enumerate(self.ids):
+            yield IpResult(id, self.ips[index], self.errors.get(index))
+
+    @property
+    def success_count(self) -> int:
+        return sum(self.ok)
+
+    def unique_ips(self) -> set:
+        return {ip for ip in self.ips if ip is not None}
+
+    def ip_counts(self) -> Counter:
+        return Counter(ip for ip in self.ips if ip is not None)
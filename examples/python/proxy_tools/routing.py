@@ -0,0 +1,284 @@
+"""
+Automatic proxy product routing per target domain.
+
+Instead of hard-coding a ``ProxyProduct``, let a router pick RESIDENTIAL,
+MOBILE, DATACENTER or ISP for each domain from what it has measured there:
+an exponentially weighted success rate and latency per (domain, product),
+combined with the relative per-GB cost of each product.
+
+Policy (epsilon-greedy over EWMA stats):
+
+- products are probed cheapest first, ``min_samples`` requests each, and
+  probing stops at the first product whose success rate reaches
+  ``min_success``: pricier products are never probed for a domain a cheaper
+  one already handles;
+- among the measured products that qualify, the one with the lowest
+  ``cost / success + latency_weight * latency`` is used;
+- if none qualifies, traffic goes to the ``fallback`` product (residential);
+- a small ``explore`` fraction of requests tries another product, so a
+  product that was blocked earlier gets a chance to recover.
+
+Only 2xx/3xx responses count as success by default (pass ``ok=`` to the
+client to change that, e.g. to accept 404s). A failed request (any other
+status or a connection error) is recorded against its product and retried
+once on the fallback product, so callers never see a failure caused by
+routing to a cheaper product.
+
+``ProxyConfig`` host and port are reset to the chosen product's defaults.
+
+Usage:
+    router = ProductRouter()
+    client = RoutedClient(ThordataClient(...), router)
+    response = client.get("https://example.com/", proxy_config=base_config)
+    router.report()
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import urlsplit
+
+PRODUCTS = ("datacenter", "isp", "residential", "mobile")
+
+# Relative price per GB; adjust to your plan with ``costs=``.
+DEFAULT_COSTS = {
+    "datacenter": 1.0,
+    "isp": 2.0,
+    "residential": 4.0,
+    "mobile": 8.0,
+}
+
+
+def product_name(product: Any) -> str:
+    return str(getattr(product, "value", product)).lower()
+
+
+def domain_of(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+
+@dataclass
+class ProductStats:
+    """EWMA success rate and latency of one product on one domain."""
+
+    success: float = 1.0
+    latency: float = 0.0
+    samples: int = 0
+    blocks: int = 0
+
+    def update(self, ok: bool, seconds: float, alpha: float) -> None:
+        if self.samples == 0:
+            self.success = 1.0 if ok else 0.0
+            self.latency = seconds
+        else:
+            self.success += alpha * ((1.0 if ok else 0.0) - self.success)
+            if ok:
+                self.latency += alpha * (seconds - self.latency)
+        self.samples += 1
+        if not ok:
+            self.blocks += 1
+
+
+class ProductRouter:
+    """Chooses a product per domain; thread-safe, shared by sync and async clients."""
+
+    def __init__(self, products: tuple = PRODUCTS, costs: dict | None = None,
+                 fallback: Any = "residential", alpha: float = 0.2, min_success: float = 0.9,
+                 min_samples: int = 3, latency_weight: float = 1.0, explore: float = 0.05,
+                 seed: int | None = None):
+        self.costs = {**DEFAULT_COSTS, **{product_name(k): v for k, v in (costs or {}).items()}}
+        self.products = sorted((product_name(p) for p in products), key=lambda p: self.costs.get(p, 1.0))
+        self.fallback = product_name(fallback)
+        self.alpha = alpha
+        self.min_success = min_success
+        self.min_samples = min_samples
+        self.latency_weight = latency_weight
+        self.explore = explore
+        self._stats: dict[str, dict[str, ProductStats]] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _score(self, product: str, stats: ProductStats) -> float:
+        return self.costs.get(product, 1.0) / max(stats.success, 1e-6) + self.latency_weight * stats.latency
+
+    def choose(self, domain: str) -> str:
+        with self._lock:
+            by_product = self._stats.setdefault(domain, {})
+            if self.explore and self._rng.random() < self.explore:
+                return self._rng.choice(self.products)
+            qualified = self._qualified(by_product)
+            if qualified:
+                return min(qualified, key=lambda p: self._score(p, by_product[p]))
+            for product in self.products:  # cheapest first
+                stats = by_product.get(product)
+                if stats is None or stats.samples < self.min_samples:
+                    return product
+            if self.fallback in self.products:
+                return self.fallback
+            return max(self.products, key=lambda p: by_product[p].success)
+
+    def _qualified(self, by_product: dict) -> list:
+        """Measured products meeting ``min_success``, once the cheapest one that does has been probed."""
+        qualified = []
+        for product in self.products:
+            stats = by_product.get(product)
+            if stats is None or stats.samples < self.min_samples:
+                if not qualified:
+                    return []  # a cheaper product still needs probing
+                continue
+            if stats.success >= self.min_success:
+                qualified.append(product)
+        return qualified
+
+    def record(self, domain: str, product: Any, ok: bool, seconds: float) -> None:
+        with self._lock:
+            by_product = self._stats.setdefault(domain, {})
+            by_product.setdefault(product_name(product), ProductStats()).update(ok, seconds, self.alpha)
+
+    def stats(self, domain: str) -> dict[str, ProductStats]:
+        with self._lock:
+            return {p: dataclasses.replace(s) for p, s in self._stats.get(domain, {}).items()}
+
+    def preferred(self, domain: str) -> str | None:
+        """Best measured product for ``domain``, without exploring."""
+        with self._lock:
+            by_product = dict(self._stats.get(domain, {}))
+        eligible = [
+            p for p, s in by_product.items()
+            if s.samples >= self.min_samples and s.success >= self.min_success
+        ]
+        if not eligible:
+            return self.fallback if by_product else None
+        return min(eligible, key=lambda p: self._score(p, by_product[p]))
+
+    # -- persistence -------------------------------------------------------
+
+    def save(self, path: str | Path) -> None:
+        """Write the learned stats as JSON so the next run starts warm."""
+        with self._lock:
+            data = {d: {p: dataclasses.asdict(s) for p, s in ps.items()} for d, ps in self._stats.items()}
+        Path(path).write_text(json.dumps(data, indent=1))
+
+    def load(self, path: str | Path) -> None:
+        data = json.loads(Path(path).read_text())
+        with self._lock:
+            for domain, by_product in data.items():
+                self._stats[domain] = {p: ProductStats(**s) for p, s in by_product.items()}
+
+    def report(self) -> None:
+        with self._lock:
+            snapshot = {d: dict(ps) for d, ps in self._stats.items()}
+        print()
+        print(" Product routing:")
+        for domain in sorted(snapshot):
+            print(f"   {domain}  ->  {self.preferred(domain) or '-'}")
+            for product in self.products:
+                s = snapshot[domain].get(product)
+                if s is None:
+                    continue
+                print(f"     {product:<12} success {s.success:>5.0%}  latency {s.latency * 1000:>6.0f} ms"
+                      f"  samples {s.samples:>4d}  blocked {s.blocks:>3d}")
+
+
+def configure(proxy_config: Any, product: str) -> Any:
+    """``proxy_config`` switched to ``product``, with that product's host and port."""
+    if product_name(getattr(proxy_config, "product", "")) == product:
+        return proxy_config
+    try:
+        from thordata import ProxyProduct
+    except ImportError:
+        pass
+    else:
+        product = ProxyProduct(product)
+    return dataclasses.replace(proxy_config, product=product, host=None, port=None)
+
+
+def default_ok(status: int) -> bool:
+    """2xx and 3xx count as success; 401/407 (credentials), 403/429 (blocks) and 5xx don't."""
+    return 200 <= status < 400
+
+
+class RoutedClient:
+    """Wraps a sync client; ``get`` routes by domain and falls back on failure."""
+
+    def __init__(self, client: Any, router: ProductRouter | None = None,
+                 ok: Callable[[int], bool] = default_ok):
+        self._client = client
+        self.router = router or ProductRouter()
+        self.ok = ok
+
+    def _attempt(self, domain: str, product: str, url: str, proxy_config: Any, kwargs: dict) -> Any:
+        started = time.perf_counter()
+        try:
+            response = self._client.get(url, proxy_config=configure(proxy_config, product), **kwargs)
+        except Exception:
+            self.router.record(domain, product, False, time.perf_counter() - started)
+            raise
+        self.router.record(domain, product, self.ok(response.status_code), time.perf_counter() - started)
+        return response
+
+    def get(self, url: str, proxy_config: Any, **kwargs: Any) -> Any:
+        domain = domain_of(url)
+        product = self.router.choose(domain)
+        try:
+            response = self._attempt(domain, product, url, proxy_config, kwargs)
+            if self.ok(response.status_code) or product == self.router.fallback:
+                return response
+            response.close()
+        except Exception:
+            if product == self.router.fallback:
+                raise
+        return self._attempt(domain, self.router.fallback, url, proxy_config, kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+
+class AsyncRoutedClient:
+    """Async counterpart of :class:`RoutedClient` for ``AsyncThordataClient``."""
+
+    def __init__(self, client: Any, router: ProductRouter | None = None,
+                 ok: Callable[[int], bool] = default_ok):
+        self._client = client
+        self.router = router or ProductRouter()
+        self.ok = ok
+
+    async def _attempt(self, domain: str, product: str, url: str, proxy_config: Any, kwargs: dict) -> Any:
+        started = time.perf_counter()
+        try:
+            response = await self._client.get(url, proxy_config=configure(proxy_config, product), **kwargs)
+        except Exception:
+            self.router.record(domain, product, False, time.perf_counter() - started)
+            raise
+        self.router.record(domain, product, self.ok(response.status), time.perf_counter() - started)
+        return response
+
+    async def get(self, url: str, proxy_config: Any, **kwargs: Any) -> Any:
+        domain = domain_of(url)
+        product = self.router.choose(domain)
+        try:
+            response = await self._attempt(domain, product, url, proxy_config, kwargs)
+            if self.ok(response.status) or product == self.router.fallback:
+                return response
+            response.release()
+        except Exception:
+            if product == self.router.fallback:
+                raise
+        return await self._attempt(domain, self.router.fallback, url, proxy_config, kwargs)
+
+    async def __aenter__(self) -> AsyncRoutedClient:
+        await self._client.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> Any:
+        return await self._client.__aexit__(*exc)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
@@ -0,0 +1,155 @@
+"""
+Per-session tunnel reuse for sticky sessions.
+
+Every request through a proxy to an HTTPS site needs a TCP connection to the
+proxy, a CONNECT tunnel and a TLS handshake with the target. ``ThordataClient``
+already caches a kept-alive ``urllib3.ProxyManager`` per endpoint and
+credentials, and the proxy username embeds the session id, so the SDK reuses
+a sticky session's tunnel as well. ``StickyTunnelPool`` keeps the same one
+tunnel per (sticky session, target host) and adds what the SDK cache lacks:
+
+- expiry: once the session's ``duration_minutes`` is over its tunnels are
+  closed and the next request opens a fresh one, instead of the old
+  connection lingering in the cache;
+- a bound: at most ``max_sessions`` sessions are kept (LRU), while the SDK
+  caches a connection pool for every session it has ever seen;
+- observability: ``stats()`` reports requests and tunnels per session.
+
+Concurrent requests in one session to the same host take turns on its
+tunnel (waiting up to their ``timeout``) rather than opening extra ones.
+
+When ``THORDATA_UPSTREAM_PROXY`` is set or the endpoint is SOCKS, requests
+are delegated to the regular ``ThordataClient``.
+
+Usage:
+    pool = StickyTunnelPool(fallback_client=ThordataClient(...))
+    session = StickySession(username=..., password=..., duration_minutes=10)
+    pool.get("https://example.com/login", session)
+    pool.get("https://example.com/account", session)  # same tunnel, no new handshake
+    print(pool.stats(session))
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+from urllib.parse import urlsplit
+
+import requests
+import urllib3
+
+from ._transport import can_connect_directly, new_proxy_manager, to_response
+
+DEFAULT_SESSION_MINUTES = 10
+
+
+@dataclass
+class _SessionEntry:
+    manager: urllib3.ProxyManager
+    expires_at: float
+    requests: int = 0
+    hosts: set = field(default_factory=set)
+
+
+class StickyTunnelPool:
+    """Keep-alive tunnels keyed by sticky session and target host."""
+
+    def __init__(self, fallback_client: Any = None, max_sessions: int = 100):
+        self.fallback_client = fallback_client
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[str, _SessionEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(session: Any) -> str:
+        # The proxy username embeds the session id, product and geo targeting.
+        return f"{session.build_proxy_endpoint()}|{session.build_username()}"
+
+    @staticmethod
+    def _lifetime(session: Any) -> float:
+        minutes = (
+            getattr(session, "duration_minutes", None)
+            or getattr(session, "session_duration", None)
+            or DEFAULT_SESSION_MINUTES
+        )
+        return minutes * 60.0
+
+    def _entry(self, session: Any) -> _SessionEntry:
+        key = self._key(session)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(key)
+            if entry is not None and entry.expires_at <= now:
+                # Session expired on the Thordata side too: drop its tunnels.
+                entry.manager.clear()
+                entry = None
+            if entry is None:
+                # One tunnel per target host per session; concurrent callers wait for it.
+                manager = new_proxy_manager(session, maxsize=1, block=True)
+                entry = _SessionEntry(manager, now + self._lifetime(session))
+                self._sessions[key] = entry
+            self._sessions.move_to_end(key)
+            while len(self._sessions) > self.max_sessions:
+                _, oldest = self._sessions.popitem(last=False)
+                oldest.manager.clear()
+            return entry
+
+    def request(self, method: str, url: str, session: Any, timeout: float = 30,
+                headers: dict | None = None, body: Any = None) -> requests.Response:
+        if not can_connect_directly(session):
+            if self.fallback_client is None:
+                raise RuntimeError("upstream/SOCKS proxies need fallback_client=ThordataClient(...)")
+            method_fn = getattr(self.fallback_client, method.lower())
+            return method_fn(url, proxy_config=session, timeout=timeout, headers=headers, data=body)
+
+        entry = self._entry(session)
+        http_resp = entry.manager.request(
+            method.upper(),
+            url,
+            body=body,
+            headers=headers,
+            timeout=urllib3.Timeout(connect=timeout, read=timeout),
+            retries=False,
+            pool_timeout=timeout,
+            preload_content=True,  # body fully read -> connection goes back to the pool
+        )
+        with self._lock:
+            entry.requests += 1
+            entry.hosts.add(urlsplit(url)._replace(path="", query="", fragment="").geturl())
+
+        return to_response(http_resp.status, url, http_resp.data or b"", http_resp.headers)
+
+    def get(self, url: str, session: Any, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, session, **kwargs)
+
+    def post(self, url: str, session: Any, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, session, **kwargs)
+
+    def stats(self, session: Any) -> dict:
+        """Requests sent and tunnels opened for ``session`` (tunnels == 1 means full reuse)."""
+        with self._lock:
+            entry = self._sessions.get(self._key(session))
+            if entry is None:
+                return {"requests": 0, "tunnels": 0, "expires_in": 0.0}
+            requests_sent, hosts = entry.requests, list(entry.hosts)
+        tunnels = sum(entry.manager.connection_from_url(host).num_connections for host in hosts)
+        return {
+            "requests": requests_sent,
+            "tunnels": tunnels,
+            "expires_in": max(0.0, entry.expires_at - time.monotonic()),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            for entry in self._sessions.values():
+                entry.manager.clear()
+            self._sessions.clear()
+
+    def __enter__(self) -> StickyTunnelPool:
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
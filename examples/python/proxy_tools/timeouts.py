@@ -0,0 +1,245 @@
+"""
+Phased timeout budgets with deadline propagation.
+
+A single scalar ``timeout`` lets a slow CONNECT eat the whole budget, and the
+SDK's internal retries (3 by default) can multiply it. Here a request has:
+
+- ``connect`` / ``tunnel`` / ``tls``: establishing the proxy connection, the
+  CONNECT tunnel and the TLS session. The SDK performs these as one step, so
+  they are enforced together as the *setup* budget (time to response headers);
+- ``read_idle``: the longest allowed gap between body chunks, so a slow but
+  healthy download is never cut off as long as bytes keep arriving;
+- ``total``: a :class:`Deadline` for the whole operation, passed through
+  retries and fan-outs so every attempt only gets the budget that is left.
+
+The async path enforces each phase separately. The SDK's sync client reads
+the whole body inside ``get()`` and only accepts one number, which urllib3
+applies per socket operation, so a plain ``ThordataClient`` is unphased: it
+gets ``max(setup, read_idle)`` capped by the remaining deadline, and the
+deadline is only checked between attempts. Wrap it in :class:`PhasedClient`
+to enforce the phases on the sync path too: it talks to the proxy through its
+own urllib3 pool with separate connect (setup) and read (read-idle) timeouts
+and checks the deadline after every body chunk. Upstream and SOCKS proxies
+still go through the wrapped client, unphased.
+
+Create clients with ``retry_config=RetryConfig(max_retries=0)`` so retries
+happen in :func:`retry_sync`, where the deadline is respected, rather than
+inside the SDK.
+
+Usage:
+    timeouts = Timeouts(connect=3, tunnel=3, tls=3, read_idle=10, total=30)
+    deadline = timeouts.deadline()
+    client = PhasedClient(ThordataClient(...))
+    response = retry_sync(lambda: fetch_sync(client, url, timeouts, deadline, proxy_config=proxy), deadline)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, TypeVar
+
+import requests
+import urllib3
+
+from ._transport import ProxyManagers, can_connect_directly, to_response
+
+T = TypeVar("T")
+
+CHUNK_SIZE = 64 * 1024
+
+
+class DeadlineExceeded(TimeoutError):
+    """The overall deadline ran out (or a phase exceeded its budget)."""
+
+
+@dataclass(frozen=True)
+class Timeouts:
+    connect: float = 5.0
+    tunnel: float = 5.0
+    tls: float = 5.0
+    read_idle: float = 15.0
+    total: float = 60.0
+
+    @property
+    def setup(self) -> float:
+        return self.connect + self.tunnel + self.tls
+
+    def deadline(self) -> Deadline:
+        return Deadline(self.total)
+
+
+class Deadline:
+    """Absolute point in time by which an operation (including retries) must finish."""
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def cap(self, seconds: float) -> float:
+        """Return ``seconds`` limited to what is left; raise if nothing is left."""
+        left = self.remaining()
+        if left <= 0.0:
+            raise DeadlineExceeded("deadline exceeded")
+        return min(seconds, left)
+
+    def child(self, seconds: float) -> Deadline:
+        """A tighter deadline for a sub-operation that never outlives this one."""
+        child = Deadline(0)
+        child.expires_at = min(self.expires_at, time.monotonic() + seconds)
+        return child
+
+
+def _unphased(timeouts: Timeouts, deadline: Deadline) -> float:
+    return deadline.cap(max(timeouts.setup, timeouts.read_idle))
+
+
+def _translate(error: Exception, url: str) -> Exception:
+    """urllib3 errors as the SDK would raise them; phase timeouts become ``DeadlineExceeded``."""
+    cause = getattr(error, "original_error", None)
+    if isinstance(error, urllib3.exceptions.TimeoutError) or isinstance(cause, urllib3.exceptions.TimeoutError):
+        return DeadlineExceeded(f"{url}: {error}")
+    try:
+        from thordata.exceptions import ThordataNetworkError
+    except ImportError:
+        return error
+    return ThordataNetworkError(f"Request failed: {error}", original_error=error)
+
+
+class PhasedClient:
+    """
+    Wraps a sync ``ThordataClient`` so ``fetch_sync`` can enforce each phase.
+
+    ``get(url, proxy_config=..., timeout=Timeouts(...), deadline=...)`` uses
+    ``setup`` as the urllib3 connect timeout (proxy connect, CONNECT tunnel
+    and TLS), ``read_idle`` as the read timeout (each wait for headers or a
+    body chunk), and raises :class:`DeadlineExceeded` once the deadline
+    passes mid-body. A plain number as ``timeout``, extra request arguments,
+    or an upstream/SOCKS proxy go to the wrapped client unchanged.
+    """
+
+    phased = True
+
+    def __init__(self, client: Any, chunk_size: int = CHUNK_SIZE):
+        self._client = client
+        self.chunk_size = chunk_size
+        self._managers = ProxyManagers()
+
+    def get(self, url: str, proxy_config: Any = None, timeout: Any = None, deadline: Deadline | None = None,
+            headers: dict | None = None, **kwargs: Any) -> requests.Response:
+        if not isinstance(timeout, Timeouts) or kwargs or not can_connect_directly(proxy_config):
+            if isinstance(timeout, Timeouts):
+                timeout = _unphased(timeout, deadline or timeout.deadline())
+            if headers is not None:
+                kwargs["headers"] = headers
+            return self._client.get(url, proxy_config=proxy_config, timeout=timeout, **kwargs)
+
+        deadline = deadline or timeout.deadline()
+        try:
+            http_resp = self._managers.get(proxy_config).request(
+                "GET",
+                url,
+                headers=headers,
+                timeout=urllib3.Timeout(connect=deadline.cap(timeout.setup), read=deadline.cap(timeout.read_idle)),
+                retries=False,
+                preload_content=False,
+            )
+        except urllib3.exceptions.HTTPError as e:
+            raise _translate(e, url) from e
+
+        chunks = []
+        try:
+            for chunk in http_resp.stream(self.chunk_size):
+                chunks.append(chunk)
+                if deadline.expired:
+                    raise DeadlineExceeded(f"body of {url} exceeded the deadline")
+        except urllib3.exceptions.HTTPError as e:
+            http_resp.close()
+            raise _translate(e, url) from e
+        except DeadlineExceeded:
+            http_resp.close()
+            raise
+        finally:
+            http_resp.release_conn()
+
+        return to_response(http_resp.status, url, b"".join(chunks), http_resp.headers)
+
+    def close(self) -> None:
+        self._managers.close()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+
+def fetch_sync(client: Any, url: str, timeouts: Timeouts, deadline: Deadline | None = None,
+               **kwargs: Any) -> Any:
+    """
+    ``client.get`` under the phase budgets and the deadline.
+
+    With a :class:`PhasedClient` (possibly behind a cassette) every phase is
+    enforced; any other client gets one unphased per-operation timeout.
+    """
+    deadline = deadline or timeouts.deadline()
+    if getattr(client, "phased", False):
+        return client.get(url, timeout=timeouts, deadline=deadline, **kwargs)
+    return client.get(url, timeout=_unphased(timeouts, deadline), **kwargs)
+
+
+async def fetch_async(client: Any, url: str, timeouts: Timeouts, deadline: Deadline | None = None,
+                      **kwargs: Any) -> tuple[Any, bytes]:
+    """
+    ``client.get`` with each phase enforced separately. Returns ``(response, body)``.
+
+    Setup (connect + tunnel + TLS, up to response headers) gets ``timeouts.setup``;
+    the body is read chunk by chunk, each chunk within ``read_idle``; everything
+    stays inside ``deadline``.
+    """
+    deadline = deadline or timeouts.deadline()
+    try:
+        response = await asyncio.wait_for(
+            client.get(url, timeout=deadline.remaining(), **kwargs),
+            deadline.cap(timeouts.setup),
+        )
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"no response headers from {url} within {timeouts.setup:.1f}s") from None
+
+    chunks = []
+    try:
+        while True:
+            chunk = await asyncio.wait_for(response.content.readany(), deadline.cap(timeouts.read_idle))
+            if not chunk:
+                break
+            chunks.append(chunk)
+    except asyncio.TimeoutError:
+        response.close()
+        raise DeadlineExceeded(f"body of {url} stalled or exceeded the deadline") from None
+    return response, b"".join(chunks)
+
+
+def retry_sync(attempt: Callable[[], T], deadline: Deadline, retries: int = 3, backoff: float = 1.0,
+               retry_on: tuple = (Exception,), min_attempt: float = 1.0,
+               on_retry: Callable[[BaseException, float], None] | None = None) -> T:
+    """
+    Retry ``attempt`` with exponential backoff, never past ``deadline``.
+
+    ``on_retry(error, wait)`` is called before each backoff sleep.
+    """
+    for n in range(retries + 1):
+        try:
+            return attempt()
+        except retry_on as e:
+            wait = backoff * (2 ** n)
+            # Stop if the backoff plus a minimally useful attempt no longer fits.
+            if n == retries or deadline.remaining() < wait + min_attempt:
+                raise
+            if on_retry is not None:
+                on_retry(e, wait)
+            time.sleep(wait)
+    raise DeadlineExceeded("unreachable")
@@ -4,11 +4,17 @@ Quick test script to validate all examples.
 
 Usage:
     python test_examples.py
+    python test_examples.py --record cassettes/   # capture live traffic
+    python test_examples.py --replay cassettes/   # offline, recorded timings
+    python test_examples.py --replay cassettes/ --latency-scale 0
 """
 
+import argparse
 import os
 import subprocess
 import sys
+import tempfile
+import time
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -19,6 +25,28 @@ load_dotenv()
 EXAMPLES_DIR = Path(__file__).parent / "examples" / "python"
 
 
+# Placeholders so examples start up when replaying without real credentials.
+REPLAY_ENV_DEFAULTS = {
+    "THORDATA_SCRAPER_TOKEN": "replay",
+    "THORDATA_RESIDENTIAL_USERNAME": "replay",
+    "THORDATA_RESIDENTIAL_PASSWORD": "replay",
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run all Python examples")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--record", metavar="DIR", help="Record each example's traffic into DIR")
+    mode.add_argument("--replay", metavar="DIR", help="Replay each example's traffic from DIR (offline)")
+    parser.add_argument(
+        "--latency-scale",
+        type=float,
+        default=1.0,
+        help="Scale replayed latencies (0 = no sleeping)"
+    )
+    return parser.parse_args()
+
+
 def check_env():
     """Check if required environment variables are set."""
     required = [
@@ -36,7 +64,23 @@ def check_env():
     return True
 
 
-def test_example(script_path: Path) -> tuple[bool, str]:
+def cassette_env(script_path: Path, args) -> dict:
+    """Environment for one example run, pointing it at its cassette if requested."""
+    env = dict(os.environ)
+    directory = args.record or args.replay
+    if directory:
+        env["THORDATA_CASSETTE"] = str(Path(directory).resolve() / f"{script_path.stem}.jsonl.gz")
+        env["THORDATA_CASSETTE_MODE"] = "record" if args.record else "replay"
+        env["THORDATA_CASSETTE_LATENCY_SCALE"] = str(args.latency_scale)
+        # Start stateful examples from scratch so recording and replay send the same requests.
+        env["THORDATA_CRAWL_DB"] = str(Path(tempfile.mkdtemp(prefix="thordata-crawl-")) / "crawl.db")
+    if args.replay:
+        for name, value in REPLAY_ENV_DEFAULTS.items():
+            env.setdefault(name, value)
+    return env
+
+
+def test_example(script_path: Path, env: dict = None) -> tuple[bool, str]:
     """Test a single example script."""
     try:
         result = subprocess.run(
@@ -45,6 +89,7 @@ def test_example(script_path: Path) -> tuple[bool, str]:
             text=True,
             timeout=60,
             cwd=script_path.parent,
+            env=env,
         )
         if result.returncode == 0:
             return True, "OK"
@@ -57,11 +102,17 @@ def test_example(script_path: Path) -> tuple[bool, str]:
 
 
 def main():
+    args = parse_args()
+
     print("Testing Thordata Proxy Examples")
+    if args.record:
+        print(f"Recording traffic into {args.record}")
+    elif args.replay:
+        print(f"Replaying traffic from {args.replay} (latency x{args.latency_scale:g})")
     print("=" * 60)
     print()
 
-    if not check_env():
+    if not args.replay and not check_env():
         sys.exit(1)
 
     # Find all Python example files
@@ -78,24 +129,29 @@ def main():
     results = []
     for example_file in example_files:
         print(f"Testing {example_file.name}...", end=" ")
-        success, message = test_example(example_file)
+        if args.replay and not (Path(args.replay) / f"{example_file.stem}.jsonl.gz").exists():
+            print("[SKIP] no cassette")
+            continue
+        started = time.perf_counter()
+        success, message = test_example(example_file, cassette_env(example_file, args))
+        elapsed = time.perf_counter() - started
         status = "[OK]" if success else "[FAIL]"
-        print(f"{status}")
+        print(f"{status} ({elapsed:.2f}s)")
         if not success:
             print(f"   Error: {message}")
-        results.append((example_file.name, success))
+        results.append((example_file.name, success, elapsed))
 
     print()
     print("=" * 60)
     print("Summary:")
     print()
 
-    passed = sum(1 for _, success in results if success)
+    passed = sum(1 for _, success, _ in results if success)
     total = len(results)
 
-    for name, success in results:
+    for name, success, elapsed in results:
         status = "[OK]" if success else "[FAIL]"
-        print(f"   {status} {name}")
+        print(f"   {status} {name:<32} {elapsed:6.2f}s")
 
     print()
     print(f"Passed: {passed}/{total}")
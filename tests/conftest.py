@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# proxy_tools lives next to the examples that use it.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "examples" / "python"))
@@ -0,0 +1,106 @@
+import asyncio
+import time
+
+import pytest
+import requests
+
+from proxy_tools.cassette import (
+    AsyncReplayClient,
+    Cassette,
+    CassetteMiss,
+    RecordingClient,
+    ReplayClient,
+    ReplayedError,
+)
+from proxy_tools.timeouts import DeadlineExceeded
+
+
+class Config:
+    def __init__(self, country="us", session="a"):
+        self.product = "residential"
+        self.country = country
+        self.session_id = session
+
+
+class FakeClient:
+    """Answers ``/slow`` with DeadlineExceeded and everything else with a gzip-served JSON body."""
+
+    def get(self, url, proxy_config=None, **kwargs):
+        if url.endswith("/slow"):
+            raise DeadlineExceeded(f"{url}: total")
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{"ip": "203.0.113.7"}'
+        response.headers["Content-Type"] = "application/json"
+        response.headers["Content-Encoding"] = "gzip"
+        response.headers["Content-Length"] = "41"
+        response.headers["Set-Cookie"] = "id=1"
+        return response
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    cassette = Cassette(tmp_path / "c.jsonl.gz")
+    cassette.start_recording()
+    client = RecordingClient(FakeClient(), cassette)
+    client.get("https://example.com/ip", proxy_config=Config())
+    with pytest.raises(DeadlineExceeded):
+        client.get("https://example.com/slow", proxy_config=Config())
+    cassette.append({"key": "GET|https://example.com/odd|||||", "error": "Vanished",
+                     "module": "no_such_module", "message": "gone", "elapsed": 0.0})
+    return cassette.path
+
+
+def test_record_replay_round_trip(recorded):
+    client = ReplayClient(Cassette(recorded), latency_scale=0)
+    # The sticky session id is not part of the match.
+    response = client.get("https://example.com/ip", proxy_config=Config(session="b"))
+    assert (response.status_code, response.json()) == (200, {"ip": "203.0.113.7"})
+    assert dict(response.headers) == {"content-type": "application/json"}
+    with pytest.raises(DeadlineExceeded, match="total"):
+        client.get("https://example.com/slow", proxy_config=Config())
+    # A type from a module that isn't loaded is never imported.
+    with pytest.raises(ReplayedError, match="Vanished: gone"):
+        client.get("https://example.com/odd")
+
+
+def test_replay_misses(recorded):
+    client = ReplayClient(Cassette(recorded), latency_scale=0)
+    with pytest.raises(CassetteMiss):
+        client.get("https://example.com/ip", proxy_config=Config(country="de"))
+    client.get("https://example.com/ip", proxy_config=Config())
+    with pytest.raises(CassetteMiss):
+        client.get("https://example.com/ip", proxy_config=Config())
+
+
+def test_latency_scale(tmp_path):
+    cassette = Cassette(tmp_path / "c.jsonl.gz")
+    cassette.start_recording()
+    for _ in range(2):
+        cassette.record_response("GET|https://example.com/|||||", 200, {}, b"ok", elapsed=0.2, body_elapsed=0.2)
+
+    def timed(client):
+        started = time.perf_counter()
+        assert client.get("https://example.com/").content == b"ok"
+        return time.perf_counter() - started
+
+    assert timed(ReplayClient(Cassette(cassette.path), latency_scale=0.5)) == pytest.approx(0.2, abs=0.08)
+    assert timed(ReplayClient(Cassette(cassette.path), latency_scale=0)) < 0.05
+
+
+def test_async_replay_splits_header_and_body_latency(tmp_path):
+    cassette = Cassette(tmp_path / "c.jsonl.gz")
+    cassette.start_recording()
+    cassette.record_response("GET|https://example.com/|||||", 200, {}, b"{}", elapsed=0.1, body_elapsed=0.2)
+
+    async def scenario():
+        client = AsyncReplayClient(Cassette(cassette.path), latency_scale=1.0)
+        started = time.perf_counter()
+        response = await client.get("https://example.com/")
+        headers_at = time.perf_counter() - started
+        assert await response.json() == {}
+        return headers_at, time.perf_counter() - started
+
+    headers_at, total = asyncio.run(scenario())
+    assert headers_at == pytest.approx(0.1, abs=0.05)
+    assert total == pytest.approx(0.3, abs=0.08)
@@ -0,0 +1,196 @@
+import asyncio
+import gzip
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import pytest
+import requests
+
+from proxy_tools.compression import (
+    AsyncCompressedClient,
+    CompressedClient,
+    StreamDecoder,
+    brotli,
+    zstandard,
+)
+
+BODY = b'{"ip": "203.0.113.7", "country": "US"} ' * 2000
+
+
+def compress(data, encoding):
+    if encoding == "gzip":
+        return gzip.compress(data)
+    if encoding == "deflate":
+        return zlib.compress(data)
+    if encoding == "raw-deflate":
+        return zlib.compress(data)[2:-4]
+    if encoding == "br":
+        return brotli.compress(data)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor().compress(data)
+    raise ValueError(encoding)
+
+
+def needs(encoding):
+    if encoding == "br" and brotli is None:
+        pytest.skip("brotli not installed")
+    if encoding == "zstd" and zstandard is None:
+        pytest.skip("zstandard not installed")
+
+
+class CompressingProxy(BaseHTTPRequestHandler):
+    """Plain HTTP proxy stand-in: the URL path names the encodings to apply, in order."""
+
+    def do_GET(self):
+        names = [n for n in urlsplit(self.path).path.strip("/").split(",") if n]
+        body = BODY
+        for name in names:
+            body = compress(body, name)
+        self.send_response(200)
+        if names:
+            header = ", ".join("deflate" if n == "raw-deflate" else n for n in names)
+            self.send_header("Content-Encoding", header)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def proxy():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CompressingProxy)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield Config(f"http://127.0.0.1:{server.server_address[1]}")
+    server.shutdown()
+    server.server_close()
+
+
+class Config:
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+
+    def build_proxy_endpoint(self):
+        return self.endpoint
+
+    def build_proxy_basic_auth(self):
+        return "user:pass"
+
+
+def wire_size(names):
+    body = BODY
+    for name in names:
+        body = compress(body, name)
+    return len(body)
+
+
+@pytest.mark.parametrize("names", [
+    ["gzip"], ["deflate"], ["raw-deflate"], ["br"], ["zstd"], ["gzip", "br"], [],
+])
+def test_get_decodes_and_accounts(proxy, names):
+    for name in names:
+        needs(name)
+    client = CompressedClient(chunk_size=1024)
+    response = client.get(f"http://example.com/{','.join(names)}", proxy_config=proxy)
+    assert response.status_code == 200
+    assert response.content == BODY
+    assert "content-encoding" not in response.headers
+    info = response.compression
+    assert info.wire_bytes == wire_size(names)
+    assert info.body_bytes == len(BODY)
+    assert info.ratio == pytest.approx(len(BODY) / wire_size(names))
+    assert client.stats.requests == 1
+    assert client.stats.body_bytes == len(BODY)
+
+
+def test_stream_yields_bounded_chunks(proxy):
+    client = CompressedClient(chunk_size=1024)
+    with client.stream("http://example.com/gzip", proxy_config=proxy) as response:
+        chunks = list(response)
+    assert b"".join(chunks) == BODY
+    assert max(map(len, chunks)) <= 1024
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "deflate", "br", "zstd"])
+def test_decode_bomb_stays_bounded(encoding):
+    needs(encoding)
+    bomb = compress(b"\0" * 20_000_000, encoding)
+    decoder = StreamDecoder(encoding, max_chunk=64 * 1024)
+    largest = total = 0
+    for start in range(0, len(bomb), 64 * 1024):
+        for chunk in decoder.decode(bomb[start:start + 64 * 1024]):
+            largest, total = max(largest, len(chunk)), total + len(chunk)
+    for chunk in decoder.flush():
+        largest, total = max(largest, len(chunk)), total + len(chunk)
+    assert total == 20_000_000
+    assert largest <= 64 * 1024
+
+
+@pytest.mark.parametrize("encoding", ["deflate", "raw-deflate"])
+def test_deflate_in_one_byte_chunks(encoding):
+    raw = compress(BODY, encoding)
+    decoder = StreamDecoder("deflate")
+    out = b"".join(chunk for i in range(len(raw)) for chunk in decoder.decode(raw[i:i + 1]))
+    assert out + b"".join(decoder.flush()) == BODY
+
+
+def test_async_client_decodes_and_accounts(proxy):
+    pytest.importorskip("aiohttp")
+
+    async def fetch():
+        async with AsyncCompressedClient() as client:
+            response = await client.get("http://example.com/gzip", proxy_config=proxy)
+            return await response.read(), response.compression, client.stats
+
+    body, info, stats = asyncio.run(fetch())
+    assert body == BODY
+    assert (info.wire_bytes, info.body_bytes) == (wire_size(["gzip"]), len(BODY))
+    assert stats.requests == 1
+
+
+class SocksConfig:
+    def build_proxy_endpoint(self):
+        return "socks5h://127.0.0.1:1"
+
+
+class FakeSdkClient:
+    """Stands in for ThordataClient: env-default proxy plus a plain ``get``."""
+
+    def __init__(self):
+        self.default = SocksConfig()
+        self.calls = []
+
+    def _get_default_proxy_config_from_env(self):
+        return self.default
+
+    def get(self, url, proxy_config=None, **kwargs):
+        self.calls.append(proxy_config)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b"ok"
+        return response
+
+
+def test_missing_proxy_config_uses_client_default():
+    sdk = FakeSdkClient()
+    response = CompressedClient(sdk).get("https://example.com/")
+    assert response.content == b"ok"
+    assert sdk.calls == [sdk.default]
+
+
+def test_missing_proxy_config_without_credentials(monkeypatch):
+    monkeypatch.delenv("THORDATA_RESIDENTIAL_USERNAME", raising=False)
+    monkeypatch.delenv("THORDATA_RESIDENTIAL_PASSWORD", raising=False)
+    with pytest.raises(ValueError, match="proxy_config"):
+        CompressedClient().get("https://example.com/")
+
+
+def test_async_client_refuses_upstream_proxy(monkeypatch):
+    pytest.importorskip("aiohttp")
+    monkeypatch.setenv("THORDATA_UPSTREAM_PROXY", "http://upstream:3128")
+    with pytest.raises(RuntimeError, match="UPSTREAM"):
+        asyncio.run(AsyncCompressedClient(FakeSdkClient()).get("https://example.com/"))
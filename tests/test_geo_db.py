@@ -0,0 +1,92 @@
+import ipaddress
+
+import pytest
+
+from proxy_tools.geo_cli import main
+from proxy_tools.geo_db import GeoDatabase, build_geo_db, read_csv_ranges
+
+ROWS = [
+    ("1.0.0.0", "1.0.0.255", "AU", "Queensland", "Brisbane"),
+    ("8.8.8.0", "8.8.8.255", "US", "California", "Mountain View"),
+    ("10.0.0.0", "10.255.255.255", "US", "California", "Mountain View"),
+    ("100.0.0.0", "100.0.0.9", "JP"),
+    ("2001:4860::", "2001:4860:ffff:ffff:ffff:ffff:ffff:ffff", "US", None, None),
+    ("2a00:1450::", "2a00:1450:ffff:ffff:ffff:ffff:ffff:ffff", "IE", "Leinster", "Dublin"),
+]
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = tmp_path / "geo.tdgeo"
+    assert build_geo_db(ROWS, path) == (4, 2)
+    with GeoDatabase(path) as database:
+        yield database
+
+
+def test_lookup_v4_ranges(db):
+    assert db.lookup("8.8.8.8").city == "Mountain View"
+    assert db.country("1.0.0.0") == "AU"
+    assert db.country("1.0.0.255") == "AU"
+    assert db.country("10.1.2.3") == "US"
+    assert db.lookup("100.0.0.9").region is None
+
+
+def test_lookup_outside_ranges(db):
+    for ip in ("0.255.255.255", "1.0.1.0", "9.9.9.9", "100.0.0.10", "255.255.255.255", "::1", "3000::"):
+        assert db.lookup(ip) is None
+
+
+def test_lookup_v6_and_ipv4_mapped(db):
+    location = db.lookup("2a00:1450:4001::1")
+    assert (location.country, location.region, location.city) == ("IE", "Leinster", "Dublin")
+    assert db.country(ipaddress.ip_address("2001:4860:4860::8888")) == "US"
+    assert db.country("::ffff:8.8.8.8") == "US"
+    assert db.country(int(ipaddress.ip_address("1.0.0.7"))) == "AU"
+
+
+def test_lookup_non_ip_returns_none(db):
+    for value in (None, "", "not-an-ip", "999.1.1.1", -1, 1 << 129, 1.5, b"8.8.8.8", object()):
+        assert db.lookup(value) is None
+
+
+def test_locations_are_shared(tmp_path):
+    path = tmp_path / "geo.tdgeo"
+    build_geo_db(ROWS, path)
+    with GeoDatabase(path) as database:
+        assert database.location_count == 5
+
+
+def test_overlapping_ranges_are_rejected(tmp_path):
+    rows = [("1.0.0.0", "1.0.0.10", "AU"), ("1.0.0.10", "1.0.0.20", "NZ")]
+    with pytest.raises(ValueError, match="overlapping"):
+        build_geo_db(rows, tmp_path / "geo.tdgeo")
+    with pytest.raises(ValueError, match="bad range"):
+        build_geo_db([("1.0.0.0", "::1", "AU")], tmp_path / "geo.tdgeo")
+
+
+def test_old_or_foreign_file_is_rejected(tmp_path):
+    path = tmp_path / "geo.tdgeo"
+    path.write_bytes(b"TDGEODB1" + bytes(64))
+    with pytest.raises(ValueError):
+        GeoDatabase(path)
+
+
+def test_dbip_country_and_city_csv(tmp_path):
+    country_csv = tmp_path / "dbip-country-lite.csv"
+    country_csv.write_text("1.0.0.0,1.0.0.255,AU\n2001:4860::,2001:4860::ffff,US\n")
+    assert list(read_csv_ranges(country_csv, "dbip")) == [
+        ("1.0.0.0", "1.0.0.255", "AU", None, None),
+        ("2001:4860::", "2001:4860::ffff", "US", None, None),
+    ]
+    city_csv = tmp_path / "dbip-city-lite.csv"
+    city_csv.write_text("1.0.0.0,1.0.0.255,OC,AU,Queensland,Brisbane,-27.4,153.0\n")
+    assert list(read_csv_ranges(city_csv, "dbip")) == [("1.0.0.0", "1.0.0.255", "AU", "Queensland", "Brisbane")]
+
+
+def test_cli_build_and_lookup(tmp_path, capsys):
+    source = tmp_path / "dbip-country-lite.csv"
+    source.write_text("8.8.8.0,8.8.8.255,US\n")
+    output = tmp_path / "geo.tdgeo"
+    assert main(["build", str(source), str(output), "--format", "dbip"]) == 0
+    assert main(["lookup", str(output), "8.8.8.8"]) == 0
+    assert "country='US'" in capsys.readouterr().out
@@ -0,0 +1,84 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from proxy_tools.hedging import AsyncHedgedClient, Hedger
+
+
+def test_concurrent_run_sync_counts_every_request():
+    hedger = Hedger(initial_delay=5.0, hedge_config=lambda config: config)
+    hedger.latency.min_samples = 10**6  # keep the 5 s delay, so nothing is ever hedged
+    callers, per_caller = 8, 50
+
+    def caller(_):
+        for _ in range(per_caller):
+            assert hedger.run_sync(lambda config: "ok") == "ok"
+
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        list(pool.map(caller, range(callers)))
+
+    stats = hedger.snapshot()
+    assert stats.requests == callers * per_caller
+    assert stats.hedges == stats.hedge_wins == stats.budget_denied == 0
+
+
+def test_slow_primary_is_hedged_within_budget():
+    hedger = Hedger(initial_delay=0.01, budget_burst=1.0, hedge_config=lambda config: "hedge")
+
+    def attempt(config):
+        if config != "hedge":
+            time.sleep(0.2)
+        return config
+
+    assert hedger.run_sync(attempt, "primary") == "hedge"
+    assert hedger.run_sync(attempt, "primary") == "primary"  # budget spent
+    stats = hedger.snapshot()
+    assert (stats.requests, stats.hedges, stats.hedge_wins, stats.budget_denied) == (2, 1, 1, 1)
+
+
+class FakeAsyncResponse:
+    def __init__(self, status, body):
+        self.status = status
+        self.body = body
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise RuntimeError(f"HTTP {self.status}")
+
+    async def json(self):
+        return self.body
+
+
+class FakeAsyncClient:
+    """The primary answers 200 after ``delay``; the hedge answers ``hedge_status`` at once."""
+
+    def __init__(self, delay, hedge_status):
+        self.delay = delay
+        self.hedge_status = hedge_status
+
+    async def get(self, url, proxy_config=None):
+        if proxy_config == "hedge":
+            return FakeAsyncResponse(self.hedge_status, {"from": "hedge"})
+        await asyncio.sleep(self.delay)
+        return FakeAsyncResponse(200, {"from": "primary"})
+
+
+def test_async_error_status_does_not_win_the_race():
+    hedger = Hedger(initial_delay=0.01, hedge_config=lambda config: "hedge")
+    client = AsyncHedgedClient(FakeAsyncClient(delay=0.1, hedge_status=503), hedger)
+
+    async def scenario():
+        body = await client.get_json("https://example.com/", proxy_config="primary")
+        response = await client.get("https://example.com/", proxy_config="primary")
+        return body, response.status
+
+    assert asyncio.run(scenario()) == ({"from": "primary"}, 200)
+    stats = client.stats
+    assert (stats.requests, stats.hedges, stats.hedge_wins) == (2, 2, 0)
+
+
+def test_async_healthy_hedge_wins():
+    hedger = Hedger(initial_delay=0.01, hedge_config=lambda config: "hedge")
+    client = AsyncHedgedClient(FakeAsyncClient(delay=0.5, hedge_status=200), hedger)
+    assert asyncio.run(client.get_json("https://example.com/", proxy_config="primary")) == {"from": "hedge"}
+    assert client.stats.hedge_wins == 1
@@ -0,0 +1,52 @@
+import time
+
+from proxy_tools.job_queue import CLAIMED, DONE, FAILED, PENDING, JobQueue
+
+
+def make_queue(tmp_path, lease=300.0):
+    queue = JobQueue(tmp_path / "jobs.db", lease_seconds=lease)
+    queue.add_many([(f"https://example.test/{i}", {"country": "us"}) for i in range(4)])
+    return queue
+
+
+def test_add_many_is_idempotent(tmp_path):
+    with make_queue(tmp_path) as queue:
+        assert queue.add_many([("https://example.test/0", {"country": "us"})]) == 0
+        assert queue.stats()[PENDING] == 4
+
+
+def test_requeue_without_worker_leaves_live_leases_alone(tmp_path):
+    with make_queue(tmp_path) as queue:
+        queue.claim_batch(2, "live-worker")
+        assert queue.requeue_claimed() == 0
+        assert queue.stats()[CLAIMED] == 2
+
+
+def test_requeue_without_worker_takes_expired_leases(tmp_path):
+    with make_queue(tmp_path, lease=0.05) as queue:
+        queue.claim_batch(2, "gone")
+        time.sleep(0.1)
+        assert queue.requeue_claimed() == 2
+        assert queue.stats()[PENDING] == 4
+
+
+def test_requeue_named_worker(tmp_path):
+    with make_queue(tmp_path) as queue:
+        queue.claim_batch(1, "a")
+        queue.claim_batch(1, "b")
+        assert sorted(queue.claimed_workers()) == ["a", "b"]
+        assert queue.requeue_claimed("a") == 1
+        assert queue.claimed_workers() == ["b"]
+
+
+def test_claims_are_exclusive_and_results_recorded(tmp_path):
+    with make_queue(tmp_path) as queue:
+        first = queue.claim_batch(3, "a")
+        second = queue.claim_batch(3, "b")
+        assert len(first) == 3 and len(second) == 1
+        assert not {j.key for j in first} & {j.key for j in second}
+        queue.complete_many([(first[0].key, {"status": 200})])
+        queue.fail_many([(first[1].key, "HTTP 404")], max_attempts=0)
+        queue.fail_many([(first[2].key, "timeout")])
+        stats = queue.stats()
+        assert (stats[DONE], stats[FAILED], stats[PENDING]) == (1, 1, 1)
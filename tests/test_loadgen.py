@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from proxy_tools.loadgen import (
+    LatencyHistogram,
+    LoadResult,
+    RateProfile,
+    run_open_loop_async,
+)
+
+
+def test_percentile_of_empty_histogram_is_zero():
+    assert LatencyHistogram().percentile(99) == 0.0
+
+
+def test_percentile_within_bucket_precision():
+    hist = LatencyHistogram()
+    for ms in range(1, 1001):
+        hist.record(ms / 1000)
+    assert hist.total == 1000
+    assert hist.percentile(50) == pytest.approx(0.5, rel=0.02)
+    assert hist.percentile(99) == pytest.approx(0.99, rel=0.02)
+    assert hist.percentile(100) == pytest.approx(1.0, rel=0.02)
+
+
+def test_percentile_never_exceeds_max():
+    hist = LatencyHistogram()
+    hist.record(0.123456)
+    assert hist.percentile(100) <= hist.max_us / 1_000_000
+
+
+def test_record_corrected_adds_missing_samples():
+    hist = LatencyHistogram()
+    hist.record_corrected(1.0, 0.25)
+    # 1.0 plus the 0.75 / 0.5 / 0.25 samples a stalled closed loop missed
+    assert hist.total == 4
+
+
+def test_merge():
+    a, b = LatencyHistogram(), LatencyHistogram()
+    a.record(0.01)
+    b.record(2.0)
+    a.merge(b)
+    assert a.total == 2
+    assert a.percentile(100) == pytest.approx(2.0, rel=0.02)
+
+
+def test_constant_schedule_is_evenly_spaced():
+    times = list(RateProfile.constant(10, 1).schedule())
+    assert len(times) == 10
+    assert times == pytest.approx([0.1 * i for i in range(10)])
+
+
+def test_ramp_schedule_accelerates():
+    times = list(RateProfile.parse("1-20:10").schedule())
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    assert gaps[0] > gaps[-1]
+    assert all(0 <= t < 10 for t in times)
+
+
+def test_stages_are_offset():
+    profile = RateProfile.parse("2:1,4:1")
+    times = list(profile.schedule())
+    assert profile.duration == 2
+    assert [t for t in times if t < 1] == pytest.approx([0.0, 0.5])
+    assert [t for t in times if t >= 1] == pytest.approx([1.0, 1.25, 1.5, 1.75])
+
+
+def test_poisson_schedule_is_reproducible_and_roughly_on_rate():
+    profile = RateProfile.constant(50, 20)
+    first = list(profile.schedule(poisson=True, seed=7))
+    assert first == list(profile.schedule(poisson=True, seed=7))
+    assert 900 < len(first) < 1100
+
+
+def test_parse_rejects_missing_duration():
+    with pytest.raises(ValueError):
+        RateProfile.parse("10")
+
+
+def test_achieved_counts_completions_not_arrivals():
+    result = LoadResult(window_seconds=1.0)
+    # Ten requests scheduled in window 0, all finishing 10s late.
+    for i in range(10):
+        intended = i / 10
+        result.record(intended, intended, intended + 10.0, True)
+    assert result.windows[0].sent == 10
+    assert result.windows[0].completed == 0
+    assert sum(w.completed for w in result.windows.values()) == 10
+    assert result.windows[10].completed == 10
+    # Latency stays attributed to the window the requests were scheduled in.
+    assert result.windows[0].latency.total == 10
+    assert result.windows[0].latency.percentile(50) == pytest.approx(10.0, rel=0.02)
+
+
+def test_errors_are_counted_per_scheduled_window():
+    result = LoadResult(window_seconds=1.0)
+    result.record(0.1, 0.1, 0.2, True)
+    result.record(0.5, 0.5, 0.6, False)
+    assert (result.ok, result.errors) == (1, 1)
+    assert (result.windows[0].ok, result.windows[0].errors) == (1, 1)
+
+
+def test_open_loop_async_bounds_in_flight():
+    in_flight = peak = 0
+
+    async def send():
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+
+    result = asyncio.run(run_open_loop_async(send, RateProfile.constant(400, 0.25), max_in_flight=3))
+    assert peak <= 3
+    assert result.ok == result.corrected.total == 100
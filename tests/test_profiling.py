@@ -0,0 +1,31 @@
+import argparse
+
+from proxy_tools.profiling import Profiler, add_profile_args
+
+
+def profiler_for(*argv):
+    parser = argparse.ArgumentParser()
+    add_profile_args(parser)
+    return Profiler.from_args(parser.parse_args(list(argv)))
+
+
+def test_profiling_is_off_by_default():
+    assert not profiler_for().enabled
+
+
+def test_profile_every_alone_takes_both_snapshots():
+    profiler = profiler_for("--profile-every", "50")
+    assert profiler.enabled
+    assert profiler.every == 50
+    assert profiler.use_cprofile and profiler.use_tracemalloc
+
+
+def test_profile_every_with_one_kind():
+    profiler = profiler_for("--profile", "--profile-every", "50", "--profile-tracemalloc")
+    assert profiler.use_tracemalloc and not profiler.use_cprofile
+
+
+def test_profile_without_snapshots():
+    profiler = profiler_for("--profile")
+    assert profiler.enabled
+    assert not (profiler.use_cprofile or profiler.use_tracemalloc)
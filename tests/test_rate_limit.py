@@ -0,0 +1,65 @@
+import asyncio
+
+from proxy_tools.rate_limit import AsyncRateLimitedClient, QuotaLimiter
+
+
+class FakeResponse:
+    status = 200
+
+    def __init__(self):
+        self.released = False
+
+    async def read(self):
+        return b"{}"
+
+    def release(self):
+        self.released = True
+
+
+class FakeAsyncClient:
+    async def get(self, url, **kwargs):
+        return FakeResponse()
+
+
+def slot_is_free(limiter):
+    fh = limiter.concurrency._try_claim()
+    if fh is None:
+        return False
+    limiter.concurrency._release(fh)
+    return True
+
+
+def test_token_wait_does_not_hold_a_slot(tmp_path):
+    limiter = QuotaLimiter("test", rate=5, burst=1, max_concurrent=1, state_dir=tmp_path)
+    limiter.bucket.acquire()  # bucket is now empty for ~0.2 s
+
+    async def scenario():
+        waiter = asyncio.ensure_future(limiter.acquire_async())
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+        assert slot_is_free(limiter)
+        release = await waiter
+        assert not slot_is_free(limiter)
+        release()
+        assert slot_is_free(limiter)
+
+    asyncio.run(scenario())
+
+
+def test_async_client_holds_slot_until_body_is_read(tmp_path):
+    limiter = QuotaLimiter("test", max_concurrent=1, state_dir=tmp_path)
+    client = AsyncRateLimitedClient(FakeAsyncClient(), limiter)
+
+    async def scenario():
+        response = await client.get("https://example.com/")
+        assert response.status == 200
+        assert not slot_is_free(limiter)
+        assert await response.read() == b"{}"
+        assert slot_is_free(limiter)
+
+        response = await client.get("https://example.com/")
+        response.release()
+        assert response._response.released
+        assert slot_is_free(limiter)
+
+    asyncio.run(scenario())
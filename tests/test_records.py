@@ -0,0 +1,60 @@
+import pytest
+
+from proxy_tools import records
+from proxy_tools.records import IpResult, ResultBatch, decode_ip_info
+
+IPINFO = b'{"ip": "203.0.113.7", "city": "Berlin", "region": "Berlin", "country": "DE", "org": "AS1 Example", "loc": "52.5,13.4"}'
+HTTPBIN = b'{"origin": "198.51.100.2"}'
+
+
+@pytest.fixture(params=["msgspec", "orjson", "json"])
+def backend(request, monkeypatch):
+    """Run with one decoder: the faster ones are hidden as if not installed."""
+    if request.param == "msgspec":
+        pytest.importorskip("msgspec")
+    else:
+        monkeypatch.setattr(records, "msgspec", None)
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    elif request.param == "json":
+        monkeypatch.setattr(records, "orjson", None)
+    return request.param
+
+
+def test_decode_ip_info(backend):
+    info = decode_ip_info(IPINFO)
+    assert (info.ip, info.city, info.region, info.country, info.org) == (
+        "203.0.113.7", "Berlin", "Berlin", "DE", "AS1 Example",
+    )
+    assert decode_ip_info(IPINFO.decode()).country == "DE"
+
+
+def test_decode_httpbin_origin(backend):
+    info = decode_ip_info(HTTPBIN)
+    assert (info.ip, info.country) == ("198.51.100.2", None)
+    assert records.loads(HTTPBIN) == {"origin": "198.51.100.2"}
+
+
+def test_decode_invalid_body_raises_value_error(backend):
+    with pytest.raises(ValueError):
+        decode_ip_info(b"<html>blocked</html>")
+
+
+def test_result_batch_columns_and_aggregates():
+    results = [
+        IpResult(3, "203.0.113.7"),
+        IpResult(1, error="timeout"),
+        IpResult(2, "".join(["203.0.113.", "7"])),  # equal, but a distinct object
+        IpResult(4, "198.51.100.2"),
+    ]
+    batch = ResultBatch.from_results(results)
+    assert len(batch) == 4
+    assert list(batch.ids) == [3, 1, 2, 4]
+    assert batch.success_count == 3
+    assert batch.unique_ips() == {"203.0.113.7", "198.51.100.2"}
+    assert batch.ip_counts()["203.0.113.7"] == 2
+    # Identical IPs share one string object.
+    assert batch.ips[0] is batch.ips[2]
+    replayed = [(r.id, r.ip, r.error, r.ok) for r in batch]
+    assert replayed == [(r.id, r.ip, r.error, r.ok) for r in results]
+    assert [r.status for r in batch][:2] == ["success", "error: timeout"]
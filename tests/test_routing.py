@@ -0,0 +1,83 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import requests
+
+from proxy_tools.routing import ProductRouter, RoutedClient, configure, default_ok
+
+
+@dataclass
+class Config:
+    product: str = "residential"
+    host: Optional[str] = None
+    port: Optional[int] = None
+
+
+class FakeClient:
+    """Answers per (domain keyword, product) with a fixed status."""
+
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.calls = []
+
+    def get(self, url, proxy_config, **kwargs):
+        self.calls.append(proxy_config.product)
+        response = requests.Response()
+        response.status_code = self.statuses.get(proxy_config.product, 200)
+        return response
+
+
+def run(client, url, n):
+    for _ in range(n):
+        client.get(url, proxy_config=Config())
+
+
+def test_default_ok_only_accepts_2xx_3xx():
+    assert default_ok(200) and default_ok(304)
+    for status in (401, 403, 407, 429, 500, 502, 504):
+        assert not default_ok(status)
+
+
+def test_cheap_product_that_works_is_kept_and_pricier_ones_never_probed():
+    fake = FakeClient({})
+    client = RoutedClient(fake, ProductRouter(explore=0))
+    run(client, "https://easy.test/", 20)
+    assert set(fake.calls) == {"datacenter"}
+    assert client.router.preferred("easy.test") == "datacenter"
+
+
+def test_server_errors_count_as_failures_and_fall_back():
+    fake = FakeClient({"datacenter": 502, "isp": 407})
+    client = RoutedClient(fake, ProductRouter(explore=0))
+    run(client, "https://picky.test/", 20)
+    stats = client.router.stats("picky.test")
+    assert stats["datacenter"].success == 0.0
+    assert stats["isp"].success == 0.0
+    assert "mobile" not in stats
+    assert client.router.preferred("picky.test") == "residential"
+    # After probing, requests go straight to residential.
+    assert fake.calls[-5:] == ["residential"] * 5
+
+
+def test_custom_ok_predicate():
+    fake = FakeClient({"datacenter": 404})
+    client = RoutedClient(fake, ProductRouter(explore=0), ok=lambda status: status < 500)
+    run(client, "https://missing.test/", 5)
+    assert set(fake.calls) == {"datacenter"}
+
+
+def test_seeded_routers_choose_identically():
+    def choices(seed):
+        fake = FakeClient({"datacenter": 403})
+        client = RoutedClient(fake, ProductRouter(explore=0.3, seed=seed))
+        run(client, "https://x.test/", 30)
+        return fake.calls
+
+    assert choices(1) == choices(1)
+
+
+def test_configure_keeps_endpoint_only_for_the_same_product():
+    custom = Config(host="gate.example.com", port=1234)
+    assert configure(custom, "residential") is custom
+    switched = configure(custom, "datacenter")
+    assert (switched.product, switched.host, switched.port) == ("datacenter", None, None)
@@ -0,0 +1,97 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from proxy_tools.session_pool import StickyTunnelPool
+
+
+class KeepAliveProxy(BaseHTTPRequestHandler):
+    """Plain HTTP proxy stand-in that keeps connections open and counts them."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    connections = set()
+    delay = 0.0
+
+    def do_GET(self):
+        KeepAliveProxy.connections.add(self.client_address)
+        time.sleep(self.delay)
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def proxy():
+    KeepAliveProxy.connections, KeepAliveProxy.delay = set(), 0.0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveProxy)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+class Session:
+    def __init__(self, endpoint, session_id="a", duration_minutes=10):
+        self.endpoint = endpoint
+        self.session_id = session_id
+        self.duration_minutes = duration_minutes
+
+    def build_proxy_endpoint(self):
+        return self.endpoint
+
+    def build_username(self):
+        return f"td-customer-user-sessid-{self.session_id}"
+
+    def build_proxy_basic_auth(self):
+        return f"{self.build_username()}:pass"
+
+
+def test_session_reuses_one_tunnel(proxy):
+    session = Session(proxy)
+    with StickyTunnelPool() as pool:
+        for _ in range(5):
+            assert pool.get("http://example.com/", session).content == b"ok"
+        assert pool.stats(session)["requests"] == 5
+        assert pool.stats(session)["tunnels"] == 1
+    assert len(KeepAliveProxy.connections) == 1
+
+
+def test_concurrent_requests_share_the_tunnel(proxy, caplog):
+    KeepAliveProxy.delay = 0.005
+    session = Session(proxy)
+    with StickyTunnelPool() as pool, ThreadPoolExecutor(max_workers=8) as executor:
+        statuses = list(executor.map(lambda _: pool.get("http://example.com/", session).status_code, range(40)))
+        assert statuses == [200] * 40
+        assert pool.stats(session) == pytest.approx({"requests": 40, "tunnels": 1, "expires_in": 600}, abs=5)
+    assert len(KeepAliveProxy.connections) == 1
+    assert "pool is full" not in caplog.text
+
+
+def test_expired_session_opens_a_fresh_tunnel(proxy):
+    session = Session(proxy, duration_minutes=0.001)  # 60 ms
+    with StickyTunnelPool() as pool:
+        pool.get("http://example.com/", session)
+        time.sleep(0.1)
+        assert pool.stats(session)["expires_in"] == 0.0
+        pool.get("http://example.com/", session)
+        assert pool.stats(session)["requests"] == 1
+    assert len(KeepAliveProxy.connections) == 2
+
+
+def test_least_recently_used_session_is_evicted(proxy):
+    a, b, c = (Session(proxy, name) for name in "abc")
+    with StickyTunnelPool(max_sessions=2) as pool:
+        for session in (a, b, a, c):
+            pool.get("http://example.com/", session)
+        assert pool.stats(a)["requests"] == 2
+        assert pool.stats(b)["requests"] == 0
+        assert pool.stats(c)["requests"] == 1
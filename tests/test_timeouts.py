@@ -0,0 +1,131 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from proxy_tools.timeouts import (
+    Deadline,
+    DeadlineExceeded,
+    PhasedClient,
+    Timeouts,
+    fetch_sync,
+    retry_sync,
+)
+
+
+class SlowProxy(BaseHTTPRequestHandler):
+    """Plain HTTP proxy stand-in: answers with ``chunks`` body parts ``gap`` seconds apart."""
+
+    chunks = 3
+    gap = 0.0
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", str(self.chunks))
+        self.end_headers()
+        for _ in range(self.chunks):
+            self.wfile.write(b"x")
+            self.wfile.flush()
+            time.sleep(self.gap)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def proxy():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowProxy)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class Config:
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+
+    def build_proxy_endpoint(self):
+        return self.endpoint
+
+    def build_proxy_basic_auth(self):
+        return "user:pass"
+
+
+class ScalarClient:
+    def __init__(self):
+        self.timeouts = []
+
+    def get(self, url, proxy_config=None, timeout=None, **kwargs):
+        self.timeouts.append(timeout)
+        return "delegated"
+
+
+def endpoint(server):
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_phased_get_reads_body(proxy):
+    SlowProxy.chunks, SlowProxy.gap = 3, 0.0
+    client = PhasedClient(ScalarClient(), chunk_size=1)
+    response = fetch_sync(client, "http://example.com/", Timeouts(total=5), proxy_config=Config(endpoint(proxy)))
+    assert response.status_code == 200
+    assert response.content == b"xxx"
+
+
+def test_deadline_stops_slow_but_steady_body(proxy):
+    # Every gap is well inside read_idle, but the whole body is not inside the deadline.
+    SlowProxy.chunks, SlowProxy.gap = 10, 0.1
+    client = PhasedClient(ScalarClient(), chunk_size=1)
+    timeouts = Timeouts(read_idle=5, total=0.35)
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        fetch_sync(client, "http://example.com/", timeouts, proxy_config=Config(endpoint(proxy)))
+    assert time.monotonic() - started < 1.0
+
+
+def test_read_idle_timeout(proxy):
+    SlowProxy.chunks, SlowProxy.gap = 2, 0.5
+    client = PhasedClient(ScalarClient(), chunk_size=1)
+    with pytest.raises(DeadlineExceeded):
+        fetch_sync(client, "http://example.com/", Timeouts(read_idle=0.1, total=5),
+                   proxy_config=Config(endpoint(proxy)))
+
+
+def test_socks_and_plain_clients_are_unphased():
+    inner = ScalarClient()
+    timeouts = Timeouts(connect=1, tunnel=1, tls=1, read_idle=7, total=60)
+    client = PhasedClient(inner)
+    assert fetch_sync(client, "http://example.com/", timeouts, proxy_config=Config("socks5h://127.0.0.1:1")) == "delegated"
+    assert fetch_sync(inner, "http://example.com/", timeouts, Deadline(2)) == "delegated"
+    assert inner.timeouts[0] == 7
+    assert inner.timeouts[1] == pytest.approx(2, abs=0.1)
+
+
+def test_retry_sync_stops_at_the_deadline():
+    calls, waits = [], []
+
+    def attempt():
+        calls.append(1)
+        raise DeadlineExceeded("slow")
+
+    with pytest.raises(DeadlineExceeded):
+        retry_sync(attempt, Deadline(0.8), retries=5, backoff=0.1, min_attempt=0.2,
+                   on_retry=lambda error, wait: waits.append(wait))
+    # 0.1 s and 0.2 s backoffs fit; then 0.4 s + 0.2 s no longer fits in the ~0.5 s left.
+    assert len(calls) == 3
+    assert waits == [0.1, 0.2]
+
+
+def test_retry_sync_only_retries_listed_errors():
+    calls = []
+
+    def attempt():
+        calls.append(1)
+        raise KeyError("permanent")
+
+    with pytest.raises(KeyError):
+        retry_sync(attempt, Deadline(5), backoff=0.01, retry_on=(DeadlineExceeded,))
+    assert len(calls) == 1